@@ -0,0 +1,207 @@
+"""Times the board hot paths over a sweep of board sizes and mine densities and writes the results as json.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --output new.json
+
+With --baseline every result is compared with the same result in an earlier run and anything slower than the
+tolerance is reported as a regression (exit code 1). Rendering is done to an off-screen surface with the SDL dummy
+video driver so no window is opened. Run from the repository folder so the images can be found.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from statistics import median
+from time import perf_counter
+
+from data.bitboard import BitBoard
+from data.core import Board as CoreBoard
+
+SIZES = [10, 100, 1000, 4000]
+DENSITIES = [0.01, 0.1, 0.2, 0.5, 0.9]
+BACKENDS = ['list', 'array', 'bitboard']  # bitboards are not drawn so they only have the rules benchmarks
+
+
+def measure(setup, run, repeat):
+    """Calls run(setup()) repeat times, only run is timed. Returns the best and median time in seconds"""
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = perf_counter()
+        run(state)
+        times.append(perf_counter() - start)
+    return min(times), median(times)
+
+
+def new_board(board_class, size, density, use_array, **kwargs):
+    """Creates a seeded square board"""
+    board = board_class(**kwargs) if board_class is BitBoard else board_class(use_array=use_array, **kwargs)
+    board.create_new(size, size, int(size * size * density), seed=size)
+    return board
+
+
+def first_safe_tile(board):
+    """The first empty tile of the board, or the first tile without a mine if there are no empty tiles"""
+    if isinstance(board, BitBoard):
+        for tiles in (board.empty, board.full & ~board.mines):
+            if tiles:
+                return divmod((tiles & -tiles).bit_length() - 1, board.stride)
+        return 0, 0
+    if board.use_array:
+        import numpy as np
+        for tiles in (np.argwhere(board.bottom == 0), np.argwhere(board.bottom > 0)):
+            if len(tiles):
+                return tuple(tiles[0].tolist())
+        return 0, 0
+    safe = None
+    for i, row in enumerate(board.bottom):
+        for j, item in enumerate(row):
+            if item == 0:
+                return i, j
+            if item > 0 and safe is None:
+                safe = i, j
+    return safe or (0, 0)
+
+
+def board_benchmarks(size, density, backend, repeat):
+    """Benchmarks of the rules, these do not need pygame"""
+    mines = int(size * size * density)
+    use_array = backend == 'array'
+    board_class = BitBoard if backend == 'bitboard' else CoreBoard
+    board = new_board(board_class, 10, 0.1, use_array)
+
+    def reveal_setup():
+        fresh = new_board(board_class, size, density, use_array)
+        return fresh, first_safe_tile(fresh)
+
+    def count(state):
+        for _ in range(1000):
+            state.n_mines, state.n_flags, state.solved, state.exploded
+
+    return {
+        'create_new': measure(lambda: board, lambda b: b.create_new(size, size, mines, seed=size), repeat),
+        'reveal_tile': measure(reveal_setup, lambda state: state[0].reveal_tile(*state[1]), repeat),
+        'reveal_board': measure(lambda: new_board(board_class, size, density, use_array),
+                                lambda b: b.reveal_board(), repeat),
+        'counts_x1000': measure(lambda: board, count, repeat),
+    }
+
+
+def render_benchmarks(size, density, use_array, repeat, tile_size):
+    """Benchmarks of Board.draw and Game.draw drawn to off-screen surfaces"""
+    import pygame as pg
+    from data.game import Game
+    from data.mineboard import Board
+
+    board = new_board(Board, size, density, use_array, tile_size=tile_size)
+    display = pg.Surface((board.image_width, board.image_height))
+    tile = first_safe_tile(board)
+
+    def full_setup():
+        board._redraw_all = True
+        return board
+
+    def changed_setup():
+        fresh = new_board(Board, size, density, use_array, tile_size=tile_size)
+        fresh.draw(display)
+        fresh.reveal_tile(*tile)
+        return fresh
+
+    game = Game(run=False)
+    game.start_board((size, size), int(size * size * density))
+    game.draw()
+
+    return {
+        'board_draw_full': measure(full_setup, lambda b: b.draw(display), repeat),
+        'board_draw_changed': measure(changed_setup, lambda b: b.draw(display), repeat),
+        'board_draw_unchanged': measure(lambda: board, lambda b: b.draw(display), repeat),
+        'game_draw': measure(lambda: game, lambda g: g.draw(), repeat),
+    }
+
+
+def run_benchmarks(sizes, densities, repeat, max_list_cells, max_render_cells, tile_size, render):
+    """Runs every benchmark for every size, density and board type that is within the limits"""
+    if render:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import pygame as pg
+        pg.init()
+        pg.display.set_mode((1, 1))
+
+    results = []
+    for size in sizes:
+        for density in densities:
+            for backend in BACKENDS:
+                if backend != 'array' and size * size > max_list_cells:
+                    continue
+                timings = board_benchmarks(size, density, backend, repeat)
+                if render and backend != 'bitboard' and size * size <= max_render_cells:
+                    timings.update(render_benchmarks(size, density, backend == 'array', repeat, tile_size))
+                for name, (best, middle) in timings.items():
+                    result = {'name': name, 'backend': backend, 'size': size, 'density': density,
+                              'best': best, 'median': middle}
+                    results.append(result)
+                    print('{name:<22}{backend:<9}{size:>6}x{size:<6}{density:>6.0%} {best:>12.6f}s'.format(**result),
+                          file=sys.stderr)
+    return results
+
+
+def result_key(result):
+    return result['name'], result['backend'], result['size'], result['density']
+
+
+def compare(results, baseline, tolerance):
+    """Prints how each result compares with the baseline. Returns the results that are more than tolerance times
+    slower"""
+    old = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        if key not in old or not old[key]['best']:
+            continue
+        ratio = result['best'] / old[key]['best']
+        flag = ''
+        if ratio > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(result)
+        name, backend, size, density = key
+        print('{:<22}{:<9}{:>6}x{:<6}{:>6.0%} {:>8.2f}x{}'.format(name, backend, size, size, density, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks board generation, revealing and rendering')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='widths of the square boards')
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES,
+                        help='fractions of tiles that are mines')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-list-cells', type=int, default=1000 * 1000,
+                        help='list and bit boards with more tiles than this are skipped')
+    parser.add_argument('--max-render-cells', type=int, default=200 * 200,
+                        help='rendering is skipped for boards with more tiles than this')
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--no-render', action='store_true', help='skip the pygame benchmarks')
+    parser.add_argument('--output', help='json file to write the results to')
+    parser.add_argument('--baseline', help='json file of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='results slower than the baseline by more than this factor are regressions')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.densities, args.repeat, args.max_list_cells, args.max_render_cells,
+                             args.tile_size, not args.no_render)
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'repeat': args.repeat,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import pygame as pg
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 256
+
+_sources = {}  # path: image as loaded from disk
+_scaled = {}  # (path, size): scaled image
+_sprites = {}  # key: images made from other assets, see sprites()
+_unconverted = set()  # keys of _scaled and _sprites made before there was a display to convert them for
+_fonts = {}  # (name, size): font
+_text = OrderedDict()  # (font, text, antialias, colour, background): rendered text, least recently used first
+
+
+def _convert(image):
+    """Converts an image to the pixel format of the display so it blits faster, keeping transparency"""
+    return image.convert_alpha() if pg.display.get_surface() is not None else image
+
+
+def image(path):
+    """Loads an image from disk the first time it is asked for"""
+    source = _sources.get(path)
+    if source is None:
+        source = pg.image.load(path)
+        _sources[path] = source
+    return source
+
+
+def scaled(path, size):
+    """The image at path scaled to size (width, height) or to a square of size pixels. Each size of an image is only
+    scaled once and converted to the display format, images asked for before a display is set are converted on the
+    first call after it is"""
+    if isinstance(size, int):
+        size = size, size
+    key = path, size
+    result = _scaled.get(key)
+    if result is None or key in _unconverted:
+        result = _convert(pg.transform.scale(image(path), size) if result is None else result)
+        _scaled[key] = result
+        if pg.display.get_surface() is None:
+            _unconverted.add(key)
+        else:
+            _unconverted.discard(key)
+    return result
+
+
+def sprites(key, build):
+    """The result of build() made once for each key and shared by everything that asks for that key, for images that
+    are made from other assets such as the sprite atlas of each tile size. Images made before a display is set are made
+    again on the first call after it is, so they can be converted to its format"""
+    result = _sprites.get(key)
+    if result is None or key in _unconverted:
+        result = build()
+        _sprites[key] = result
+        if pg.display.get_surface() is None:
+            _unconverted.add(key)
+        else:
+            _unconverted.discard(key)
+    return result
+
+
+def font(name, size):
+    """A system font, made once for each name and size"""
+    key = name, size
+    result = _fonts.get(key)
+    if result is None:
+        result = pg.font.SysFont(name, size)
+        _fonts[key] = result
+    return result
+
+
+def text(font, message, colour, antialias=False, background=None):
+    """font.render() with the most recently used TEXT_CACHE_SIZE results kept so text that does not change between
+    frames is only rendered once. The returned surface is shared so it must not be drawn on"""
+    key = (font, message, antialias, tuple(pg.Color(colour)),
+           tuple(pg.Color(background)) if background is not None else None)
+    result = _text.get(key)
+    if result is None:
+        result = font.render(message, antialias, pg.Color(colour), background)
+        _text[key] = result
+        if len(_text) > TEXT_CACHE_SIZE:
+            _text.popitem(last=False)
+    else:
+        _text.move_to_end(key)
+    return result
+
+
+def clear():
+    """Empties every cache"""
+    _sources.clear()
+    _scaled.clear()
+    _sprites.clear()
+    _unconverted.clear()
+    _fonts.clear()
+    _text.clear()
@@ -0,0 +1,301 @@
+from data.core import Board
+
+
+class BitBoard:
+    """A board kept as bitsets in Python ints instead of lists of tiles. Bit i*stride + j is tile (i, j), where stride
+    is one more than the width so every row ends in a bit that is always clear. That spare column stops shifts to the
+    left or right from wrapping onto the next row, so the neighbours of every tile of a set can be found with eight
+    shifts and a mask. Numbers are kept as four bit planes (bit k of every tile's count), so counting and comparing
+    numbers for the whole board is a handful of int operations.
+
+    The rules and the values of top and bottom are the same as data.core.Board, and the same seed places the same
+    mines. top and bottom are built on demand so they are slow, use the bitsets for anything that runs often"""
+
+    def __init__(self, difficulty='easy'):
+        self.use_array = False  # mines are picked with data.core.Board.mine_positions which checks this
+        settings = Board.difficulties[difficulty]
+        self.create_new(settings[1], settings[2], settings[0])
+
+    def create_new(self, width, height, mines, seed=None, safe_first_click=False):
+        """Creates a new board, see data.core.Board.create_new()"""
+        if not 0 <= mines <= width * height:
+            raise ValueError('cannot place {} mines on a {}x{} board'.format(mines, width, height))
+        self._width = width
+        self._height = height
+        self.stride = width + 1
+        self.full = int(('0' + '1' * width) * height, 2)  # every tile of the board
+        self.shifts = [di * self.stride + dj for di, dj in Board.neighbours]
+        self._n_mines = mines
+        self.seed = seed
+        self.safe_first_click = safe_first_click
+
+        self.mines = 0
+        self.revealed = 0
+        self.flags = 0
+        self.hit = 0  # mines that were revealed
+        self.bad_flags = 0  # flags shown as bad mines after the board is revealed
+        self.counts = [0, 0, 0, 0]  # bit planes of the number of mines around each tile
+        self.empty = 0  # tiles with no mines around them that are not mines
+        self._n_flags = 0
+        self._n_revealed = 0
+
+        self._mines_placed = False
+        if not safe_first_click:
+            self._place_mines(Board.mine_positions(self, mines, seed))
+
+    def _place_mines(self, positions):
+        """Puts mines on the flat indices (i*width + j) in positions and counts the mines around every tile"""
+        # set the digits of a binary string rather than or-ing in one bit at a time, which copies the int every time
+        digits = bytearray(b'0' * (self.stride * self._height))
+        for position in positions:
+            i, j = divmod(int(position), self._width)
+            digits[i * self.stride + j] = ord('1')
+        mines = int(digits[::-1], 2)
+        self.mines = mines
+        self.counts = self.count(mines)
+        self.empty = self.full & ~mines & ~(self.counts[0] | self.counts[1] | self.counts[2] | self.counts[3])
+        self._mines_placed = True
+
+    def _place_mines_around(self, i, j):
+        """Places the mines of a safe_first_click board keeping (i, j) and if possible its neighbours safe"""
+        width, height = self._width, self._height
+        safe = [(i, j)] + [(i + di, j + dj) for di, dj in Board.neighbours
+                           if 0 <= i + di < height and 0 <= j + dj < width]
+        if self._n_mines > width * height - len(safe):
+            safe = safe[:1] if self._n_mines < width * height else []
+        self._place_mines(Board.mine_positions(self, self._n_mines, self.seed, [a * width + b for a, b in safe]))
+
+    def reset(self, seed=None):
+        """Creates a new board using the current boards settings"""
+        self.create_new(self._width, self._height, self._n_mines, seed, self.safe_first_click)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def n_mines(self):
+        return self._n_mines
+
+    @property
+    def n_flags(self):
+        return self._n_flags
+
+    @property
+    def n_revealed(self):
+        return self._n_revealed
+
+    @property
+    def exploded(self):
+        return self.hit != 0
+
+    @property
+    def solved(self):
+        return self._n_mines == self._width * self._height - self._n_revealed
+
+    # whole board operations
+
+    def bit(self, i, j):
+        return 1 << i * self.stride + j
+
+    def cells(self, bits):
+        """The (i, j) index of every set bit, in order"""
+        digits = bin(bits)[:1:-1]  # digits[k] is bit k
+        cells = []
+        k = digits.find('1')
+        while k != -1:
+            cells.append(divmod(k, self.stride))
+            k = digits.find('1', k + 1)
+        return cells
+
+    def spread(self, bits):
+        """Every tile next to a tile in bits"""
+        around = 0
+        for shift in self.shifts:
+            around |= bits << shift if shift > 0 else bits >> -shift
+        return around & self.full
+
+    def count(self, bits):
+        """Counts the tiles of bits around every tile. Returns four bit planes, bit k of the count of a tile is its bit
+        in plane k. The eight shifted sets are added with a ripple carry across the planes"""
+        planes = [0, 0, 0, 0]
+        for shift in self.shifts:
+            carry = (bits << shift if shift > 0 else bits >> -shift) & self.full
+            for k in range(4):
+                if not carry:
+                    break
+                planes[k], carry = planes[k] ^ carry, planes[k] & carry
+        return planes
+
+    @staticmethod
+    def add(a, b):
+        """Adds two sets of bit planes, counts are at most 8 so the carry out of the last plane is dropped"""
+        planes = []
+        carry = 0
+        for x, y in zip(a, b):
+            planes.append(x ^ y ^ carry)
+            carry = (x & y) | (carry & (x ^ y))
+        return planes
+
+    def equal(self, a, b):
+        """Tiles where the counts in bit planes a and b are the same"""
+        differ = 0
+        for x, y in zip(a, b):
+            differ |= x ^ y
+        return self.full & ~differ
+
+    def numbers(self):
+        """Revealed numbers"""
+        return self.revealed & ~self.mines & ~self.empty
+
+    def unknown(self):
+        """Tiles that are not revealed or flagged"""
+        return self.full & ~self.revealed & ~self.flags
+
+    def frontier(self):
+        """Unknown tiles next to a revealed number"""
+        return self.unknown() & self.spread(self.numbers())
+
+    def obvious_moves(self):
+        """The single tile rule for the whole board at once. Returns the tiles next to a number that already touches all
+        of its flags, which are safe, and the tiles next to a number that needs all of its unknown tiles, which are
+        mines"""
+        numbers = self.numbers()
+        unknown = self.unknown()
+        flags_around = self.count(self.flags)
+        satisfied = numbers & self.equal(flags_around, self.counts)
+        needs_all = numbers & self.equal(self.add(flags_around, self.count(unknown)), self.counts)
+        return self.spread(satisfied) & unknown, self.spread(needs_all) & unknown
+
+    # moves
+
+    def index_in_board(self, i, j):
+        return 0 <= i < self._height and 0 <= j < self._width
+
+    def reveal_tile(self, i, j):
+        """Reveals a tile and opens the empty tiles around it. Returns a list of the (i, j) indices of every tile that
+        changed"""
+        if not self.index_in_board(i, j):
+            return []
+        return self.cells(self._reveal(self.bit(i, j)))
+
+    def reveal_many(self, tiles):
+        """Reveals every (i, j) in tiles, stopping if a mine is hit. Returns the changed tiles"""
+        changed = 0
+        for i, j in tiles:
+            if self.hit:
+                break
+            if self.index_in_board(i, j):
+                changed |= self._reveal(self.bit(i, j))
+        return self.cells(changed)
+
+    def _reveal(self, bit):
+        """Reveals the tile bit, returns the bits that changed"""
+        if bit & self.flags:
+            return 0
+        if not self._mines_placed:
+            self._place_mines_around(*divmod(bit.bit_length() - 1, self.stride))
+        changed = bit & ~self.revealed
+        self.revealed |= bit
+        self._n_revealed += bool(changed)
+
+        if bit & self.mines & ~self.hit:
+            self.hit |= bit
+            return changed | self._reveal_board()
+        if bit & self.empty:
+            # spread out through newly opened empty tiles a whole ring at a time
+            opened = 0
+            edge = bit
+            while edge:
+                new = self.spread(edge) & ~self.revealed & ~self.flags & ~opened
+                opened |= new
+                edge = new & self.empty
+            self.revealed |= opened
+            self._n_revealed += bin(opened).count('1')
+            changed |= opened
+        return changed
+
+    def place_flag(self, i, j):
+        """Places or removes a flag. Returns the changed tiles"""
+        if not self.index_in_board(i, j) or self.bit(i, j) & self.revealed:
+            return []
+        bit = self.bit(i, j)
+        self.flags ^= bit
+        self._n_flags += 1 if self.flags & bit else -1
+        return [(i, j)]
+
+    def flag_many(self, tiles):
+        """Places a flag on every (i, j) in tiles that is not already flagged or revealed. Returns the changed tiles"""
+        bits = 0
+        for i, j in tiles:
+            if self.index_in_board(i, j):
+                bits |= self.bit(i, j)
+        bits &= self.unknown()
+        self.flags |= bits
+        self._n_flags += bin(bits).count('1')
+        return self.cells(bits)
+
+    def reveal_board(self):
+        """Reveals every tile except flagged mines, flags that are not on mines become bad mines. Returns the changed
+        tiles"""
+        return self.cells(self._reveal_board())
+
+    def _reveal_board(self):
+        if not self._mines_placed:  # a safe_first_click board that has not been clicked yet
+            self._place_mines(Board.mine_positions(self, self._n_mines, self.seed))
+        kept = self.flags & self.mines
+        changed = self.full & ~self.revealed & ~kept
+        self.bad_flags |= self.flags & ~self.mines
+        self.flags = kept
+        self._n_flags = bin(kept).count('1')
+        self.revealed |= changed
+        self._n_revealed += bin(changed).count('1')
+        return changed
+
+    # tile values, for drawing and comparing with data.core.Board
+
+    def tiles(self, cells):
+        """The top and bottom board values of every (i, j) in cells. Each bitset is turned into a string of digits once
+        so every tile is a few string lookups"""
+        size = self.stride * self._height
+        revealed, flags, hit, bad_flags, mines, *planes = [bin(bits)[:1:-1].ljust(size, '0') for bits in
+                                                          (self.revealed, self.flags, self.hit, self.bad_flags,
+                                                           self.mines, *self.counts)]
+        values = []
+        for i, j in cells:
+            k = i * self.stride + j
+            top = 1 if revealed[k] == '1' else 2 if flags[k] == '1' else 0
+            if hit[k] == '1':
+                bottom = -2
+            elif bad_flags[k] == '1':
+                bottom = -3
+            elif mines[k] == '1':
+                bottom = -1
+            else:
+                bottom = int(planes[3][k] + planes[2][k] + planes[1][k] + planes[0][k], 2)
+            values.append((top, bottom))
+        return values
+
+    def _rows(self, bits):
+        """bits as a list of rows of 0 and 1"""
+        digits = bin(bits)[:1:-1].ljust(self.stride * self._height, '0')
+        return [[int(digit) for digit in digits[i * self.stride:i * self.stride + self._width]]
+                for i in range(self._height)]
+
+    @property
+    def top(self):
+        revealed, flags = self._rows(self.revealed), self._rows(self.flags)
+        return [[a or 2 * b for a, b in zip(*rows)] for rows in zip(revealed, flags)]
+
+    @property
+    def bottom(self):
+        planes = [self._rows(plane) for plane in self.counts]
+        bottom = [[a + 2 * b + 4 * c + 8 * d for a, b, c, d in zip(*rows)] for rows in zip(*planes)]
+        for value, bits in ((-1, self.mines), (-2, self.hit), (-3, self.bad_flags)):
+            for i, j in self.cells(bits):
+                bottom[i][j] = value
+        return bottom
@@ -0,0 +1,53 @@
+import pygame as pg
+from math import floor
+
+
+class Camera:
+    """The part of a board that is shown on the display. rect is the area of the display the board is drawn in, x and
+    y are the board pixel (at the current zoom) shown at the top left of rect"""
+    min_tile_size = 8
+    max_tile_size = 128
+
+    def __init__(self, rect, zoom=1.0):
+        self.rect = pg.Rect(rect)
+        self.x = 0
+        self.y = 0
+        self.zoom = zoom
+
+    def tile_size(self, board):
+        """Width in pixels of a tile at the current zoom"""
+        return max(Camera.min_tile_size, min(Camera.max_tile_size, round(board.tile_size * self.zoom)))
+
+    def clamp(self, board):
+        """Stops the camera from moving past the edges of the board"""
+        size = self.tile_size(board)
+        self.x = max(0, min(self.x, board.width*size - self.rect.width))
+        self.y = max(0, min(self.y, board.height*size - self.rect.height))
+
+    def pan(self, dx, dy, board):
+        """Moves the camera by (dx, dy) pixels"""
+        self.x += dx
+        self.y += dy
+        self.clamp(board)
+
+    def zoom_at(self, factor, pos, board):
+        """Multiplies the zoom by factor keeping the board point under the display position pos in place"""
+        old_size = self.tile_size(board)
+        self.zoom = max(Camera.min_tile_size / board.tile_size,
+                        min(Camera.max_tile_size / board.tile_size, self.zoom * factor))
+        scale = self.tile_size(board) / old_size
+        offset_x, offset_y = pos[0] - self.rect.x, pos[1] - self.rect.y
+        self.x = round((self.x + offset_x) * scale - offset_x)
+        self.y = round((self.y + offset_y) * scale - offset_y)
+        self.clamp(board)
+
+    def screen_to_index(self, pos, board):
+        """Converts a display position to the (i, j) index of the tile under it"""
+        size = self.tile_size(board)
+        return floor((pos[1] - self.rect.y + self.y) / size), floor((pos[0] - self.rect.x + self.x) / size)
+
+    def visible_range(self, board):
+        """Returns first_i, last_i, first_j, last_j of the tiles that can be seen, the last values are exclusive"""
+        size = self.tile_size(board)
+        return (self.y // size, min(board.height, (self.y + self.rect.height - 1) // size + 1),
+                self.x // size, min(board.width, (self.x + self.rect.width - 1) // size + 1))
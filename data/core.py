@@ -0,0 +1,479 @@
+from random import Random
+
+np = None  # numpy is only needed for array backed boards so it is imported by the first one, see Board.__init__
+
+
+class Board:
+    """Stores minesweeper information and handles interaction such as placing a flag or revealing a tile (input and
+    rendering are handled separately). This module does not import pygame so it can be used for simulations"""
+    neighbours = [[-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [-1, 1], [1, -1], [1, 1]]
+    difficulties = {'easy': [10, 10, 10], 'intermediate': [40, 16, 16], 'expert': [99, 30, 16]}
+
+    def __init__(self, difficulty='easy', use_array=False, debug=False):
+        """Boards are created in the create_new() function. The number of mines, flags and revealed tiles are kept as
+        counters that are updated whenever the top or bottom board changes. If use_array is True the boards are stored
+        as int8 numpy arrays which is much faster for very large boards. If debug is True the counters are checked
+        against a full rescan of the board after every change"""
+        if use_array and np is None:
+            _import_numpy()
+        self.use_array = use_array
+        self.debug = debug
+        self.top = None
+        self.bottom = None
+
+        # counters
+        self._n_mines = 0
+        self._n_flags = 0
+        self._n_revealed = 0
+        self._exploded = False
+
+        # connected regions of empty tiles, see label_regions()
+        self._region_of = []
+        self._regions = []
+        self._region_starts = []  # array boards keep every region in one array, see _label_regions_array()
+        self._region_flags = []
+
+        # mines are placed by create_new() or the first reveal if safe_first_click is used
+        self.seed = None
+        self.safe_first_click = False
+        self._mines_placed = False
+
+        # a data.pool.BoardPool that reset() takes no-guess boards from, the start tile of those boards is revealed
+        self.pool = None
+        self.start = None
+
+        settings = Board.difficulties[difficulty]
+        self.create_new(settings[1], settings[2], settings[0])
+
+    def create_new(self, width, height, mines, seed=None, safe_first_click=False):
+        """Creates a new top board and bottom board and places mines in random locations. Boards made with the same
+        size, mines and seed are the same. If safe_first_click is True the mines are not placed until the first tile
+        is revealed and are kept away from that tile and its neighbours"""
+        if not 0 <= mines <= width * height:
+            raise ValueError('cannot place {} mines on a {}x{} board'.format(mines, width, height))
+        self._n_mines = mines
+        self._n_flags = 0
+        self._n_revealed = 0
+        self._exploded = False
+        self.seed = seed
+        self.safe_first_click = safe_first_click
+        self.start = None
+
+        # create empty boards
+        if self.use_array:
+            self.top = np.zeros((height, width), dtype=np.int8)
+            self.bottom = np.zeros((height, width), dtype=np.int8)
+        else:
+            self.top = [[0] * width for _ in range(height)]
+            self.bottom = [[0] * width for _ in range(height)]
+
+        self._mines_placed = False
+        if not safe_first_click:
+            self._place_mines(self.mine_positions(mines, seed))
+        if self.debug:
+            self.check_counters()
+
+    def mine_positions(self, mines, seed=None, exclude=()):
+        """Picks mines different flat indices (i*width + j) of the board that are not in exclude. Indices are sampled
+        without replacement so the time taken only depends on the number of mines. If more than half the tiles are
+        mines the safe tiles are picked instead"""
+        size = self.width * self.height
+        exclude = sorted(exclude)
+        n_free = size - len(exclude)
+        pick_safe = mines > n_free // 2
+        k = n_free - mines if pick_safe else mines
+
+        if self.use_array:
+            picked = np.random.default_rng(seed).choice(n_free, k, replace=False)
+            if pick_safe:
+                is_safe = np.zeros(n_free, dtype=bool)
+                is_safe[picked] = True
+                picked = np.flatnonzero(~is_safe)
+            for excluded in exclude:  # skip over the excluded indices
+                picked[picked >= excluded] += 1
+            return picked
+
+        picked = Random(seed).sample(range(n_free), k)
+        if pick_safe:
+            safe = set(picked)
+            picked = [position for position in range(n_free) if position not in safe]
+        if exclude:
+            for n, position in enumerate(picked):
+                for excluded in exclude:
+                    if position >= excluded:
+                        position += 1
+                picked[n] = position
+        return picked
+
+    def _place_mines(self, positions):
+        """Puts mines on the flat indices in positions and counts the mines next to every tile"""
+        width, height = self.width, self.height
+        if self.use_array:
+            is_mine = np.zeros(width * height, dtype=bool)
+            is_mine[positions] = True
+            is_mine = is_mine.reshape(height, width)
+
+            # sum the 8 shifted views of the padded mine grid (at most 8 so int8 is large enough)
+            padded = np.pad(is_mine.astype(np.int8), 1)
+            counts = np.zeros((height, width), dtype=np.int8)
+            for di, dj in Board.neighbours:
+                counts += padded[1 + di:1 + di + height, 1 + dj:1 + dj + width]
+            counts[is_mine] = -1
+            self.bottom = counts
+        else:
+            bottom = self.bottom
+            tiles = [divmod(position, width) for position in positions]
+            for i, j in tiles:
+                bottom[i][j] = -1
+            # count adjacent mines, each mine adds one to the tiles around it
+            for i, j in tiles:
+                for di, dj in Board.neighbours:
+                    if 0 <= i + di < height and 0 <= j + dj < width and bottom[i + di][j + dj] != -1:
+                        bottom[i + di][j + dj] += 1
+
+        self._mines_placed = True
+        self.label_regions()
+        if self._n_flags:  # flags placed before the first click may be on empty tiles
+            for i in range(height):
+                for j in range(width):
+                    if self.top[i][j] == 2 and not self.bottom[i][j]:
+                        self._region_flags[self._region_of[i * width + j]] += 1
+
+    def _place_mines_around(self, i, j):
+        """Places the mines of a safe_first_click board keeping (i, j) and if possible its neighbours safe"""
+        width, height = self.width, self.height
+        safe = [(i, j)] + [(i + di, j + dj) for di, dj in Board.neighbours
+                           if 0 <= i + di < height and 0 <= j + dj < width]
+        if self._n_mines > width * height - len(safe):
+            safe = safe[:1] if self._n_mines < width * height else []
+        self._place_mines(self.mine_positions(self._n_mines, self.seed, [a * width + b for a, b in safe]))
+
+    def reset(self, seed=None):
+        """Creates a new board using the current boards settings. If the board has a pool the board is taken from it
+        instead and its start tile is revealed, if the pool cannot make a board a random one is used and start is
+        left as None"""
+        record = self.pool.take() if self.pool is not None else None
+        if record is None:
+            self.create_new(self.width, self.height, int(self.n_mines), seed, self.safe_first_click)
+            return
+        self.create_new(self.width, self.height, int(self.n_mines), record[0], safe_first_click=True)
+        self.start = record[1:]
+        self.reveal_tile(*self.start)
+
+    @property
+    def width(self):
+        """Returns width of current board"""
+        return len(self.bottom[0])
+
+    @property
+    def height(self):
+        """Returns length of current board"""
+        return len(self.bottom)
+
+    @property
+    def n_mines(self):
+        """The number of mines in current board"""
+        return self._n_mines
+
+    @property
+    def n_flags(self):
+        """The number of flags placed in current board"""
+        return self._n_flags
+
+    @property
+    def n_revealed(self):
+        """The number of revealed tiles in current board"""
+        return self._n_revealed
+
+    @property
+    def exploded(self):
+        """Have any of the mines have been revealed"""
+        return self._exploded
+
+    @property
+    def solved(self):
+        """Is the number of unrevealed tiles equal to the number of mines"""
+        return self._n_mines == self.width*self.height - self._n_revealed
+
+    def count_tiles(self):
+        """Counts mines, flags, revealed tiles and hit mines by scanning the whole board. The counters kept by the
+        board should always match this, see check_counters()"""
+        if self.use_array:
+            counts = (int(np.count_nonzero((self.bottom == -1) | (self.bottom == -2))),
+                      int(np.count_nonzero(self.top == 2)),
+                      int(np.count_nonzero(self.top == 1)),
+                      bool((self.bottom == -2).any()))
+        else:
+            counts = (sum([row.count(-1) + row.count(-2) for row in self.bottom]),
+                      sum([row.count(2) for row in self.top]),
+                      sum([row.count(1) for row in self.top]),
+                      any(-2 in row for row in self.bottom))
+        if not self._mines_placed:  # mines waiting for the first click are counted as placed
+            counts = (self._n_mines,) + counts[1:]
+        return counts
+
+    def check_counters(self):
+        """Raises an AssertionError if the stored counters do not match a full rescan of the board"""
+        counters = self._n_mines, self._n_flags, self._n_revealed, self._exploded
+        scanned = self.count_tiles()
+        assert counters == scanned, 'board counters (mines, flags, revealed, exploded) are {} but a rescan ' \
+                                    'gives {}'.format(counters, scanned)
+
+    def label_regions(self):
+        """Finds every connected region of empty tiles along with the numbered tiles bordering it. Clicking on an empty
+        tile reveals exactly its region so this lets reveal_tile() open it in one step. Regions are stored as lists of
+        flat indices (i*width + j)"""
+        if self.use_array:
+            self._label_regions_array()
+            return
+        width, height = self.width, self.height
+        bottom = [item for row in self.bottom for item in row]
+        region_of = [-1] * (width * height)
+        added_to = [-1] * (width * height)  # last region each tile was added to, stops border tiles being added twice
+        regions = []
+
+        for start, item in enumerate(bottom):
+            if item or region_of[start] != -1:
+                continue
+            region = len(regions)
+            region_of[start] = added_to[start] = region
+            cells = [start]
+            stack = [start]
+            while stack:
+                i, j = divmod(stack.pop(), width)
+                for di, dj in Board.neighbours:
+                    if 0 <= i + di < height and 0 <= j + dj < width:
+                        n = (i + di) * width + j + dj
+                        if added_to[n] != region:
+                            added_to[n] = region
+                            cells.append(n)
+                            if not bottom[n]:  # keep spreading through empty tiles
+                                region_of[n] = region
+                                stack.append(n)
+            regions.append(cells)
+
+        self._region_of = region_of
+        self._regions = regions
+        self._region_flags = [0] * len(regions)
+
+    def _label_regions_array(self):
+        """Array version of label_regions(). Runs of empty tiles are found along each row, the pairs of runs that touch
+        on neighbouring rows are found with a binary search and joined into regions by hooking and shortcutting whole
+        arrays of parents, so there are no python loops over runs or tiles. The regions are kept as one array of tiles
+        sorted by region, region r is self._regions[self._region_starts[r]:self._region_starts[r + 1]]"""
+        width, height = self.width, self.height
+        empty = self.bottom == 0
+        edges = np.diff(np.pad(empty, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        run_rows, run_starts = np.nonzero(edges == 1)
+        run_ends = np.nonzero(edges == -1)[1] - 1
+
+        # runs on the next row that overlap each run (diagonals count so runs can be one tile apart), keys are spaced
+        # further apart than a row so the searches cannot reach past the next row
+        row_key = (run_rows + 1) * (width + 2)
+        start_keys, end_keys = row_key + run_starts, row_key + run_ends
+        below = row_key + width + 2
+        first = np.searchsorted(end_keys, below + run_starts - 1)
+        counts = np.maximum(np.searchsorted(start_keys, below + run_ends + 1, side='right') - first, 0)
+        a = np.repeat(np.arange(len(counts)), counts)
+        b = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(len(a))
+
+        # connect the pairs, every root is hooked onto the smallest root it touches until each region has one root,
+        # which is its first run
+        parent = np.arange(len(run_rows))
+        while len(a):
+            root_a, root_b = parent[a], parent[b]
+            joined = root_a != root_b
+            if not joined.any():
+                break
+            np.minimum.at(parent, np.maximum(root_a, root_b)[joined], np.minimum(root_a, root_b)[joined])
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+        # number the regions in order of their first run and give every empty tile its region
+        is_root = parent == np.arange(len(parent))
+        run_regions = (np.cumsum(is_root) - 1)[parent]
+        region_of = np.full(width * height, -1, dtype=np.int64)
+        empty_cells = np.flatnonzero(empty)
+        region_of[empty_cells] = np.repeat(run_regions, run_ends - run_starts + 1)
+
+        # pair every region with its empty tiles and numbered border tiles as keys of region * size + tile, the empty
+        # tiles with a number in each direction are found with a shifted view of the padded board
+        size = width * height
+        numbered = np.pad(self.bottom > 0, 1)
+        region_keys = region_of * size
+        keys = [region_keys[empty_cells] + empty_cells]
+        for di, dj in Board.neighbours:
+            cells = np.flatnonzero(empty & numbered[1 + di:1 + di + height, 1 + dj:1 + dj + width])
+            keys.append(region_keys[cells] + cells + di * width + dj)
+        keys = np.sort(np.concatenate(keys))
+        first_of_key = np.empty(len(keys), dtype=bool)  # a border tile can touch a region more than once
+        first_of_key[:1] = True
+        np.not_equal(keys[1:], keys[:-1], out=first_of_key[1:])
+        keys = keys[first_of_key]
+
+        n_regions = int(np.count_nonzero(is_root))
+        self._region_of = region_of
+        self._regions = keys % size
+        self._region_starts = np.searchsorted(keys, np.arange(n_regions + 1) * size)
+        self._region_flags = [0] * n_regions
+
+    def reveal_tile(self, i, j):
+        """Reveals tile using index and if there is no adjacent mines will clear all adjacent tiles. Returns a list of
+        the (i, j) indices of every tile that changed"""
+        changed = self._reveal(i, j)
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def reveal_many(self, tiles):
+        """Reveals every (i, j) in tiles, stopping if a mine is hit. Returns a list of the (i, j) indices of every tile
+        that changed"""
+        changed = []
+        for i, j in tiles:
+            if self._exploded:
+                break
+            changed += self._reveal(i, j)
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def _reveal(self, i, j):
+        """Reveals a tile without checking the counters, used by reveal_tile() and reveal_many()"""
+        changed = []
+        if not self.index_in_board(i, j) or self.top[i][j] == 2:  # reveal unless flag is placed
+            return changed
+        if not self._mines_placed:
+            self._place_mines_around(i, j)
+        if not self.top[i][j]:
+            self.top[i][j] = 1
+            self._n_revealed += 1
+            changed.append((i, j))
+
+        if self.bottom[i][j] == -1:  # if revealed is mine set mine to hit and reveal board
+            self.bottom[i][j] = -2
+            self._exploded = True
+            changed += self.reveal_board(list_changed=not self.use_array)
+        elif not self.bottom[i][j]:  # if revealed empty reveal all neighbours
+            region = self._region_of[i * self.width + j]
+            if changed and not self._region_flags[region]:
+                opened = self._reveal_region(region)
+            else:  # flags inside the region can stop it opening fully so spread out from the tile instead
+                opened = self._flood_fill(i, j)
+            self._n_revealed += len(opened)
+            changed += opened
+        return changed
+
+    def _reveal_region(self, region):
+        """Reveals every unrevealed tile of a precomputed region of empty tiles and its border"""
+        width = self.width
+        if self.use_array:
+            cells = self._regions[self._region_starts[region]:self._region_starts[region + 1]]
+            top = self.top.ravel()
+            cells = cells[top[cells] == 0]
+            top[cells] = 1
+            return list(zip((cells // width).tolist(), (cells % width).tolist()))
+        opened = []
+        top = self.top
+        for cell in self._regions[region]:
+            i, j = divmod(cell, width)
+            if not top[i][j]:
+                top[i][j] = 1
+                opened.append((i, j))
+        return opened
+
+    def _flood_fill(self, i, j):
+        """Reveals tiles outwards from the empty tile (i, j) without recursion, stopping at numbers and flags"""
+        width, height = self.width, self.height
+        top, bottom = self.top, self.bottom
+        opened = []
+        stack = [(i, j)]
+        while stack:
+            i, j = stack.pop()
+            for di, dj in Board.neighbours:
+                a, b = i + di, j + dj
+                if 0 <= a < height and 0 <= b < width and not top[a][b]:
+                    top[a][b] = 1
+                    opened.append((a, b))
+                    if not bottom[a][b]:
+                        stack.append((a, b))
+        return opened
+
+    def place_flag(self, i, j):
+        """Places a flag on top board. Returns a list of the (i, j) indices of every tile that changed"""
+        changed = []
+        if self.index_in_board(i, j):
+            if self.top[i][j] != 1:  # change flag if not revealed
+                self.top[i][j] = 2 - self.top[i][j]
+                self._n_flags += 1 if self.top[i][j] else -1
+                if self._mines_placed and not self.bottom[i][j]:  # flags on empty tiles stop their region opening
+                    self._region_flags[self._region_of[i * self.width + j]] += 1 if self.top[i][j] else -1
+                changed.append((i, j))
+                if self.debug:
+                    self.check_counters()
+        return changed
+
+    def flag_many(self, tiles):
+        """Places a flag on every (i, j) in tiles that is not already flagged or revealed. Returns a list of the (i, j)
+        indices of every tile that changed"""
+        changed = []
+        for i, j in tiles:
+            if self.index_in_board(i, j) and not self.top[i][j]:
+                self.top[i][j] = 2
+                self._n_flags += 1
+                if self._mines_placed and not self.bottom[i][j]:
+                    self._region_flags[self._region_of[i * self.width + j]] += 1
+                changed.append((i, j))
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def reveal_board(self, list_changed=True):
+        """Will reveal entire board except on flags that are on mines. Flags not on mines will become bad mines.
+        Returns a list of the (i, j) indices of every tile that changed, or an empty list if list_changed is False.
+        Listing every tile of a large array board takes far longer than revealing it, so hitting a mine on an array
+        board does not list them and reveal_tile() only returns the mine"""
+        if not self._mines_placed:  # a safe_first_click board that has not been clicked yet
+            self._place_mines(self.mine_positions(self._n_mines, self.seed))
+        changed = []
+        if self.use_array:
+            flagged = self.top == 2
+            flagged_mine = flagged & (self.bottom == -1)
+            self.bottom[flagged & ~flagged_mine] = -3
+            covered = ~flagged_mine & (self.top != 1)
+            if list_changed:
+                rows, columns = np.nonzero(covered)
+                changed = list(zip(rows.tolist(), columns.tolist()))
+            self._n_revealed += int(np.count_nonzero(covered))
+            self._n_flags = int(np.count_nonzero(flagged_mine))
+            self.top[~flagged_mine] = 1
+        else:
+            for i, row in enumerate(self.top):
+                for j, item in enumerate(row):
+                    if not (item == 2 and self.bottom[i][j] == -1):  # reveal unless mine is flagged
+                        if item != 1:
+                            self._n_revealed += 1
+                            if list_changed:
+                                changed.append((i, j))
+                        self.top[i][j] = 1
+                        if item == 2:  # if incorrectly flagged set as bad mine
+                            self.bottom[i][j] = -3
+                            self._n_flags -= 1
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def index_in_board(self, i, j):
+        """Checks if index is within the limits of the board"""
+        return 0 <= i < self.height and 0 <= j < self.width
+
+
+def _import_numpy():
+    """Imports numpy into this module the first time an array backed board is made"""
+    global np
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError('numpy is required for array backed boards')
@@ -1,83 +1,257 @@
 from data.gui import *
+from data import assets
 from data.mineboard import Board
-import sys  # need to rework state engine to remove sys.exit from menu
+from data.camera import Camera
+from data.movelog import LogWriter, REVEAL, FLAG
+from data.pool import get_pool
+from data.probability import ProbabilityEngine
+from data.profiler import Profiler
+from time import perf_counter_ns
+from random import getrandbits
 
 
 class Game:
-    mine_img = pg.image.load('img/mine.png')
-    ng_img = pg.image.load('img/ng_icon.png')
-    rg_img = pg.image.load('img/rg_icon.png')
+    mine_img = assets.image('img/mine.png')
+    ng_img = assets.image('img/ng_icon.png')
+    rg_img = assets.image('img/rg_icon.png')
 
-    def __init__(self):
+    def __init__(self, run=True, event_driven=EVENT_DRIVEN, log_path=MOVE_LOG, profile_path=PROFILE_DUMP,
+                 no_guess=NO_GUESS):
+        """Starts the game loop unless run is False, which is used to drive the game from benchmarks. If event_driven
+        is True the loop sleeps until there is input or the timer needs updating instead of running at FPS. If log_path
+        is given every game is recorded to that move log, see data/movelog.py. If profile_path is given the frame
+        times are written to it as csv or json when the game closes. If no_guess is True every board can be solved
+        without guessing, see data/pool.py"""
         # Pygame components
         self.clock = pg.time.Clock()
         self.screen = None
+        self.event_driven = event_driven
+        self.no_guess = no_guess
+        self.waiting_events = []  # event that woke the event driven loop
 
         # state engine
         self.states = {'menu': self.new_board,
                        'reset': self.reset_board,
-                       'game': self.play}
+                       'game': self.play,
+                       'replay': self.play_replay}
         self.next_state = 'menu'
 
         # game variables
         self.running = True
         self.click = None
         self.t = 0
+        self.last_tick = 0  # pg.time.get_ticks() when t was last brought up to date
 
         # game components
         self.board = None
+        self.camera = None
         self.ng_button = None
         self.rg_button = None
-        self.run()
+
+        # move log, the time of the last move is kept as moves are stored as the time since the last one
+        self.log = LogWriter(log_path) if log_path else None
+        self.last_move = 0
+        self.replay_moves = None
+        self.replay_move = None
+        self.replay_due = 0
+
+        # frame timing, the overlay is toggled with p
+        self.profile_path = profile_path
+        self.profiler = Profiler(keep_all=bool(profile_path))
+        self.show_profile = False
+
+        # mine probabilities drawn over the covered tiles, toggled with h
+        self.hints = ProbabilityEngine()
+        self.show_hints = False
+        if run:
+            self.run()
 
     def new_board(self):
-        """Creates a new board from menu settings"""
-        size, mines = menu(self.clock)
-        self.board = Board(tile_size=TILESIZE)
-        self.board.create_new(size[0], size[1], mines)
-        self.screen = pg.display.set_mode((self.board.image_width, self.board.image_height + self.board.tile_size))
-        self.ng_button = Button((size[0]-0.8)*self.board.tile_size,
-                                (size[1]+0.2)*self.board.tile_size,
+        """Creates a new board from menu settings, or stops the game if the window is closed in the menu"""
+        settings = menu(self.clock, self.event_driven)
+        if settings is None:
+            self.running = False
+            return
+        size, mines = settings
+        self.profiler.skip()
+        self.start_board(size, mines)
+
+    def start_board(self, size, mines, seed=None, safe_first_click=True, use_array=False):
+        """Creates a new board of size (width, height) and the window and buttons to fit it. Boards get a random seed
+        if none is given so they can be logged"""
+        self.board = Board(tile_size=TILESIZE, use_array=use_array)
+        self.board.create_new(size[0], size[1], mines, getrandbits(63) if seed is None else seed, safe_first_click)
+        if self.no_guess and seed is None:  # replays make their own board from the seed
+            self.board.pool = get_pool(size[0], size[1], mines, use_array)
+            self.board.reset(getrandbits(63))  # the seed is used if the pool has no board, so it can be logged
+        self.set_caption()
+        # boards bigger than the largest window are scrolled with the camera
+        view_width, view_height = min(self.board.image_width, MAX_W), min(self.board.image_height, MAX_H)
+        self.camera = Camera((0, 0, view_width, view_height))
+        self.screen = pg.display.set_mode((view_width, view_height + self.board.tile_size))
+        self.ng_button = Button(view_width - 0.8*self.board.tile_size,
+                                view_height + 0.2*self.board.tile_size,
                                 self.board.tile_size*0.6, self.board.tile_size*0.6,
                                 '', fill=True)
-        self.rg_button = Button((size[0]-1.8)*self.board.tile_size,
-                                (size[1]+0.2)*self.board.tile_size,
+        self.rg_button = Button(view_width - 1.8*self.board.tile_size,
+                                view_height + 0.2*self.board.tile_size,
                                 self.board.tile_size*0.6, self.board.tile_size*0.6,
                                 '', fill=True)
+        self.start_log()
+        self.update_hints()
         self.next_state = 'game'
 
     def reset_board(self):
         """Creates a new board based using current settings"""
-        self.board.reset()
+        self.board.reset(getrandbits(63))
+        self.set_caption()
+        self.start_log()
+        self.update_hints()
         self.next_state = 'game'
 
+    def set_caption(self):
+        """Tells the player in the window title if no-guess mode could not get a no-guess board"""
+        if self.board.pool is not None and self.board.start is None:
+            pg.display.set_caption('Minesweeper - this board may need guessing')
+        else:
+            pg.display.set_caption('Minesweeper')
+
+    def start_log(self):
+        """Starts recording the current board to the move log"""
+        self.last_move = self.t
+        self.last_tick = pg.time.get_ticks()
+        if self.log is not None:
+            self.log.start_board(self.board)
+            if self.board.start is not None:  # no-guess boards start with a tile revealed
+                self.log.add(REVEAL, self.board.start[0], self.board.start[1])
+
+    def tick_timer(self):
+        """Adds the time since it was last brought up to date to the timer. This is done before a click is handled so
+        the click is timed to when it was made, not to the end of the frame before"""
+        now = pg.time.get_ticks()
+        self.t += now - self.last_tick
+        self.last_tick = now
+
+    def log_move(self, op, index, changed):
+        """Records a move that changed the board"""
+        if self.log is not None and changed:
+            self.log.add(op, index[0], index[1], self.t - self.last_move)
+            self.last_move = self.t
+
+    def update_hints(self):
+        """Works out the mine probabilities again if they are being shown, only the parts of the board that changed are
+        counted again"""
+        if self.show_hints and self.board is not None:
+            self.board.show_probabilities(self.hints.update(self.board))
+
     def play(self):
-        print('game')
+        keys = pg.key.get_pressed()
+        dx = (keys[pg.K_RIGHT] or keys[pg.K_d]) - (keys[pg.K_LEFT] or keys[pg.K_a])
+        dy = (keys[pg.K_DOWN] or keys[pg.K_s]) - (keys[pg.K_UP] or keys[pg.K_w])
+        if dx or dy:
+            self.camera.pan(dx * PAN_SPEED, dy * PAN_SPEED, self.board)
         if not self.board.exploded and not self.board.solved:
-            index = self.board.mouse_to_index((0, 0))
+            self.tick_timer()
+            index = self.board.mouse_to_index((0, 0), self.camera)
+            if not self.camera.rect.collidepoint(pg.mouse.get_pos()):
+                self.click = None  # clicks on the bar under the board
+            changed = []
             if self.click == 'Left':
-                self.board.reveal_tile(index[0], index[1])
+                changed = self.board.reveal_tile(index[0], index[1])
+                self.log_move(REVEAL, index, changed)
             elif self.click == 'Right':
-                self.board.place_flag(index[0], index[1])
-            self.t += self.clock.get_time()
+                changed = self.board.place_flag(index[0], index[1])
+                self.log_move(FLAG, index, changed)
+            if changed:
+                self.update_hints()
+        if self.rg_button.update():
+            self.next_state = 'reset'
+        if self.ng_button.update():
+            self.next_state = 'menu'
+
+    def start_replay(self, game):
+        """Shows a LoggedGame from a move log being played at the speed it was recorded"""
+        self.start_board((game.width, game.height), game.mines, game.seed, game.safe_first_click, game.use_array)
+        self.replay_moves = game.moves()
+        self.replay_due = self.t
+        self.next_replay_move()
+        self.next_state = 'replay'
+
+    def next_replay_move(self):
+        self.replay_move = next(self.replay_moves, None)
+        if self.replay_move is not None:
+            self.replay_due += self.replay_move[0]
+
+    def play_replay(self):
+        """Makes the moves of a replay once the time they were made at is reached, then hands over to the player"""
+        self.tick_timer()
+        moved = False
+        while self.replay_move is not None and self.replay_due <= self.t:
+            dt, op, i, j = self.replay_move
+            if op == REVEAL:
+                self.board.reveal_tile(i, j)
+            else:
+                self.board.place_flag(i, j)
+            moved = True
+            self.next_replay_move()
+        if moved:
+            self.update_hints()
+        if self.replay_move is None:
+            self.next_state = 'game'
         if self.rg_button.update():
             self.next_state = 'reset'
         if self.ng_button.update():
             self.next_state = 'menu'
 
     def run(self):
-        """Game loop"""
-        while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
+        """Game loop. The move log and frame times are written out however the loop ends"""
+        try:
+            while self.running:
+                self.profiler.start()
+                self.handle_events()
+                self.profiler.mark('events')
+                self.update()
+                if not self.running:  # the window was closed in the menu
+                    break
+                self.profiler.mark('update')
+                self.draw()
+                self.profiler.mark('draw')
+                self.profiler.end_frame(self.board.tiles_drawn)
+
+                self.clock.tick(FPS)
+                if self.event_driven:
+                    self.wait()
+        finally:
+            if self.log is not None:
+                self.log.close()
+            if self.profile_path:
+                self.profiler.dump(self.profile_path)
+
+    def wait(self):
+        """Sleeps until there is an event or the timer needs redrawing"""
+        event = pg.event.wait(self.wait_time())
+        if event.type != pg.NOEVENT:
+            self.waiting_events.append(event)
 
-            self.clock.tick(FPS)
+    def wait_time(self):
+        """How long in ms the event driven loop can sleep for, 0 means until the next event"""
+        keys = pg.key.get_pressed()
+        if any(keys[key] for key in (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN, pg.K_a, pg.K_d, pg.K_w, pg.K_s)):
+            return 1000 // FPS  # keep scrolling while a key is held
+        if self.next_state == 'replay':
+            return max(1, min(self.replay_due - self.t, 1000 - self.t % 1000))
+        if self.next_state != 'game':
+            return 1
+        if not self.board.exploded and not self.board.solved:
+            return 1000 - self.t % 1000  # next time the timer changes
+        return 0
 
     def handle_events(self):
         """Gets user input (except mouse movement)"""
         self.click = None
-        for event in pg.event.get():
+        events = self.waiting_events + pg.event.get()
+        self.waiting_events = []
+        for event in events:
             if event.type == pg.QUIT:
                 self.running = False
             if event.type == pg.KEYDOWN:
@@ -85,48 +259,98 @@ class Game:
                     self.next_state = 'menu'
                 if event.key == pg.K_r:
                     self.next_state = 'reset'
+                if event.key == pg.K_p:
+                    self.show_profile = not self.show_profile
+                    if not self.show_profile and self.board is not None:
+                        self.board._redraw_all = True  # uncover the board under the overlay
+                if event.key == pg.K_h and self.board is not None:
+                    self.show_hints = not self.show_hints
+                    if self.show_hints:
+                        self.update_hints()
+                    else:
+                        self.board.show_probabilities(None)
             if event.type == pg.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     self.click = 'Left'
                 if event.button == 3:
                     self.click = 'Right'
+            if event.type == pg.MOUSEWHEEL and self.camera is not None:
+                self.camera.zoom_at(ZOOM_STEP ** event.y, pg.mouse.get_pos(), self.board)
+            if event.type == pg.MOUSEMOTION and event.buttons[1] and self.camera is not None:  # drag with middle button
+                self.camera.pan(-event.rel[0], -event.rel[1], self.board)
 
     def update(self):
         """Changes game state to next state"""
         self.states[self.next_state]()
 
     def draw(self):
-        """Draw data board and data end messages"""
-        self.screen.fill(pg.Color('white'))
-        self.board.draw(self.screen)
+        """Draw data board and data end messages. Only the parts of the screen that changed are updated"""
+        start = perf_counter_ns()
+        dirty_rects = self.board.draw(self.screen, self.camera)
+        self.profiler.add('board', perf_counter_ns() - start)
+        view = self.camera.rect
         if self.board.solved:
             win_mess_1 = "Solved!"
-            win_img_1 = BUTTONFONT.render(win_mess_1, True, FONTBLUE, BGGREY)
-            self.screen.blit(win_img_1,
-                             ((self.board.image_width - win_img_1.get_width())/2,
-                              self.board.image_height/2 - int(0.5*TILESIZE)))
+            win_img_1 = assets.text(BUTTONFONT, win_mess_1, FONTBLUE, True, BGGREY)
+            dirty_rects.append(self.screen.blit(win_img_1,
+                                                ((view.width - win_img_1.get_width())/2,
+                                                 view.height/2 - int(0.5*TILESIZE))))
+
+        # the bar under the board holds the buttons, time and flags so it is redrawn every frame
+        bar_rect = pg.Rect(0, view.bottom, view.width, self.board.tile_size)
+        self.screen.fill(pg.Color('white'), bar_rect)
+        dirty_rects.append(bar_rect)
         self.ng_button.draw(self.screen)
         self.rg_button.draw(self.screen)
         self.screen.blit(Game.ng_img, self.ng_button.rect.topleft)
         self.screen.blit(Game.rg_img, self.rg_button.rect.topleft)
 
         time = int(min(self.t/1000, 9999))
-        time_img = SCROLLFONT.render('Time: ' + str(time), False, FONTBLUE)
-        self.screen.blit(time_img, (0.2 * self.board.tile_size, self.board.image_height + 0.2 * self.board.tile_size))
+        time_img = assets.text(SCROLLFONT, 'Time: ' + str(time), FONTBLUE)
+        self.screen.blit(time_img, (0.2 * self.board.tile_size, view.bottom + 0.2 * self.board.tile_size))
 
-        flag_img = SCROLLFONT.render('Flags: ' + str(self.board.n_mines - self.board.n_flags), False, FONTBLUE)
-        self.screen.blit(flag_img, (3 * TILESIZE, self.board.image_height + 0.2 * TILESIZE))
+        flag_img = assets.text(SCROLLFONT, 'Flags: ' + str(self.board.n_mines - self.board.n_flags), FONTBLUE)
+        self.screen.blit(flag_img, (3 * TILESIZE, view.bottom + 0.2 * TILESIZE))
 
-        pg.display.flip()
+        if self.show_profile:
+            dirty_rects.append(self.draw_profile())
+        pg.display.update(dirty_rects)
+
+    def draw_profile(self):
+        """Draws the frame times of the last few seconds over the top left of the board. Returns the rect drawn to"""
+        profiler = self.profiler
+        lines = ['frame p50 {:.2f}ms p99 {:.2f}ms'.format(profiler.percentile('frame', 50),
+                                                           profiler.percentile('frame', 99))]
+        lines += ['{} p50 {:.2f}ms p99 {:.2f}ms'.format(phase, profiler.percentile(phase, 50),
+                                                        profiler.percentile(phase, 99))
+                  for phase in ('events', 'update', 'draw', 'board')]
+        lines.append('tiles drawn {}'.format(profiler.tiles[-1] if len(profiler) else 0))
+
+        line_height = SCROLLFONT.get_linesize()
+        counts = profiler.histogram('frame')
+        rect = pg.Rect(self.camera.rect.topleft, (220, line_height * len(lines) + 44))
+        rect = rect.clip(self.camera.rect)
+        self.screen.fill(BLACK, rect)
+        for n, line in enumerate(lines):
+            self.screen.blit(SCROLLFONT.render(line, False, WHITE), (rect.x + 4, rect.y + n * line_height))
+
+        # histogram of frame times in 1ms buckets, the last bucket is 19ms and slower
+        tallest = max(counts) or 1
+        bottom = rect.y + line_height * len(lines) + 40
+        for n, count in enumerate(counts):
+            height = round(36 * count / tallest)
+            self.screen.fill(GREEN if n < 1000 // FPS else RED, (rect.x + 4 + n * 10, bottom - height, 8, height))
+        return rect
 
 
-def menu(clock):
-    """menu to select number of mines and board size"""
+def menu(clock, event_driven=EVENT_DRIVEN):
+    """menu to select number of mines and board size. If event_driven is True the menu is only updated after input.
+    Returns None if the window is closed"""
     running = True
     window_dimensions = 300, 400
     background_colour = pg.Color('lightgrey')
     display = pg.display.set_mode(window_dimensions)
-    mine_img = pg.image.load('img/mine.png')
+    mine_img = assets.image('img/mine.png')
     pg.display.set_icon(mine_img)
     pg.display.set_caption('Minesweeper')
 
@@ -142,15 +366,15 @@ def menu(clock):
     # default data attributes
     size = HEIGHT, WIDTH
     n_of_mines = 5
+    waiting_events = []
 
     while running:
-        for event in pg.event.get():
+        for event in waiting_events + pg.event.get():
             if event.type == pg.KEYDOWN:
                 if event.key == pg.K_RETURN:
                     running = False
             if event.type == pg.QUIT:
-                pg.quit()
-                sys.exit()
+                return None
 
         n_of_mines = scroll_bar1.update()
         w = scroll_bar2.update()
@@ -168,5 +392,8 @@ def menu(clock):
         pg.display.flip()
 
         clock.tick(FPS)
+        if event_driven and running:
+            event = pg.event.wait()
+            waiting_events = [event] if event.type != pg.NOEVENT else []
 
     return size, n_of_mines
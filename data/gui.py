@@ -1,4 +1,5 @@
 from settings import *
+from data import assets
 
 
 class Scrollbar:
@@ -71,7 +72,7 @@ class Scrollbar:
         return self.value
 
     def draw(self, surface):
-        value_img = SCROLLFONT.render(self.message + str(int(self.value)), False, FONTBLUE)
+        value_img = assets.text(SCROLLFONT, self.message + str(int(self.value)), FONTBLUE)
         # draw bounding box
         pg.draw.rect(surface, pg.Color('white'), self.box_rect)
         pg.draw.rect(surface, pg.Color('black'), self.box_rect, 1)
@@ -107,10 +108,10 @@ class Button:
         return False
 
     def draw(self, surface):
-        mess_img = BUTTONFONT.render(self.message, False, FONTBLUE)
+        mess_img = assets.text(BUTTONFONT, self.message, FONTBLUE)
         bg_col = WHITE
         if self.hovering:
-            mess_img = BUTTONFONT.render(self.message, False, FONTBLUE.correct_gamma(0.5))
+            mess_img = assets.text(BUTTONFONT, self.message, FONTBLUE.correct_gamma(0.5))
             if self.fill:
                 bg_col = FONTBLUE
         pg.draw.rect(surface, bg_col, self.rect)
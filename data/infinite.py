@@ -0,0 +1,260 @@
+import dbm
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from random import Random
+
+from data.core import Board
+
+
+class Chunk:
+    """A chunk_size x chunk_size piece of an InfiniteBoard. Tiles are stored row by row using the same values as the top
+    and bottom boards of data.core.Board"""
+    __slots__ = ('top', 'bottom', 'touched')
+
+    def __init__(self, bottom, top=None):
+        self.bottom = bottom
+        self.top = top if top is not None else bytearray(len(bottom))
+        self.touched = top is not None  # untouched chunks do not need saving as they can be made again from the seed
+
+
+class ChunkStore:
+    """Keeps the top board of chunks that have been evicted from memory. Chunks are zlib compressed and kept in a dbm
+    file if a path is given, otherwise in a dict"""
+
+    def __init__(self, path=None):
+        self.db = dbm.open(path, 'c') if path else {}
+
+    def save(self, key, top):
+        self.db['{},{}'.format(*key)] = zlib.compress(bytes(top))
+
+    def load(self, key):
+        """Returns the saved top board of a chunk or None if it has never been saved"""
+        data = self.db.get('{},{}'.format(*key))
+        return bytearray(zlib.decompress(data)) if data is not None else None
+
+    def close(self):
+        if not isinstance(self.db, dict):
+            self.db.close()
+
+
+class InfiniteBoard:
+    """An unbounded board made of chunks that are generated when they are first used. The mines of a chunk come from a
+    seed made from the board seed and the chunk position, so a chunk can always be made again and the numbers on the
+    edge of a chunk agree with the mines of the chunks next to it. Only the most recently used chunks are kept in
+    memory, the rest are saved to a ChunkStore and loaded again when they are revisited.
+
+    Revealing and flagging work the same as data.core.Board and use the same tile values. Indices can be negative"""
+
+    def __init__(self, density=0.15, chunk_size=32, seed=0, max_chunks=256, store_path=None, max_flood=4096):
+        """max_flood limits how many tiles one click can reveal, with a low density the empty tiles can go on forever.
+        The empty tiles the last stopped flood did not get to are kept, at most max_flood of them, and
+        continue_flood() or a click on an empty tile inside that flood carries on from them"""
+        self.chunk_size = chunk_size
+        self.mines_per_chunk = round(density * chunk_size * chunk_size)
+        self.seed = seed
+        self.max_chunks = max_chunks
+        self.max_flood = max_flood
+
+        self.chunks = OrderedDict()  # (ci, cj): Chunk, least recently used first
+        self.store = ChunkStore(store_path)
+        self._mine_cache = OrderedDict()
+        self._pending = deque()  # revealed empty tiles whose neighbours the stopped flood has not opened yet
+        self._pending_area = None  # [top, left, bottom, right] of the tiles the stopped flood opened
+
+        # counters
+        self._n_flags = 0
+        self._n_revealed = 0
+        self.hit = None  # index of the mine that was revealed
+
+    @property
+    def n_flags(self):
+        """The number of flags placed"""
+        return self._n_flags
+
+    @property
+    def n_revealed(self):
+        """The number of revealed tiles"""
+        return self._n_revealed
+
+    @property
+    def flooding(self):
+        """Is there a stopped flood that continue_flood() would carry on"""
+        return bool(self._pending)
+
+    @property
+    def exploded(self):
+        """Has a mine been revealed"""
+        return self.hit is not None
+
+    def chunk_mines(self, ci, cj):
+        """The set of local indices (row * chunk_size + column) of the mines in chunk (ci, cj)"""
+        key = ci, cj
+        mines = self._mine_cache.get(key)
+        if mines is None:
+            rng = Random('{}:{}:{}'.format(self.seed, ci, cj))
+            mines = frozenset(rng.sample(range(self.chunk_size * self.chunk_size), self.mines_per_chunk))
+            self._mine_cache[key] = mines
+            if len(self._mine_cache) > 9 * self.max_chunks:
+                self._mine_cache.popitem(last=False)
+        else:
+            self._mine_cache.move_to_end(key)
+        return mines
+
+    def _make_bottom(self, ci, cj):
+        """Works out the bottom board of a chunk from its mines and the mines around its edges. Each mine adds one to
+        the tiles around it so the work is proportional to the number of mines"""
+        size = self.chunk_size
+        bottom = array('b', bytes(size * size))
+        mines = []
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for mine in self.chunk_mines(ci + di, cj + dj):
+                    i, j = divmod(mine, size)
+                    i, j = i + di * size, j + dj * size
+                    if -1 <= i <= size and -1 <= j <= size:  # in the chunk or touching it
+                        mines.append((i, j))
+
+        for i, j in mines:
+            for di, dj in Board.neighbours:
+                if 0 <= i + di < size and 0 <= j + dj < size:
+                    bottom[(i + di) * size + j + dj] += 1
+        for i, j in mines:
+            if 0 <= i < size and 0 <= j < size:
+                bottom[i * size + j] = -1
+        return bottom
+
+    def chunk(self, ci, cj):
+        """Returns chunk (ci, cj), loading or generating it if it is not in memory"""
+        key = ci, cj
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = Chunk(self._make_bottom(ci, cj), self.store.load(key))
+        self.chunks[key] = chunk
+        while len(self.chunks) > self.max_chunks:
+            old_key, old_chunk = self.chunks.popitem(last=False)
+            if old_chunk.touched:
+                self.store.save(old_key, old_chunk.top)
+        return chunk
+
+    def _locate(self, i, j):
+        """Returns the chunk holding tile (i, j) and the index of the tile in it"""
+        size = self.chunk_size
+        return self.chunk(i // size, j // size), (i % size) * size + j % size
+
+    def top(self, i, j):
+        """Top board value of tile (i, j)"""
+        chunk, k = self._locate(i, j)
+        return chunk.top[k]
+
+    def bottom(self, i, j):
+        """Bottom board value of tile (i, j), -2 if it is the mine that was hit"""
+        if (i, j) == self.hit:
+            return -2
+        chunk, k = self._locate(i, j)
+        return chunk.bottom[k]
+
+    def reveal_tile(self, i, j):
+        """Reveals tile using index and if there is no adjacent mines will clear all adjacent tiles, crossing into other
+        chunks as needed. Clicking a revealed empty tile inside the stopped flood carries it on. Returns a list of the
+        (i, j) indices of every tile that changed"""
+        if self.exploded:
+            return []
+        chunk, k = self._locate(i, j)
+        if chunk.top[k] == 2:  # reveal unless flag is placed
+            return []
+        if chunk.top[k] == 1:
+            if not chunk.bottom[k] and self._in_stopped_flood(i, j):
+                return self.continue_flood()
+            return []
+        chunk.top[k] = 1
+        chunk.touched = True
+        self._n_revealed += 1
+        if chunk.bottom[k] == -1:
+            self.hit = i, j
+            return [(i, j)]
+        if chunk.bottom[k]:
+            return [(i, j)]
+        return [(i, j)] + self._flood_fill(deque([(i, j)]), [i, j, i, j])
+
+    def _in_stopped_flood(self, i, j):
+        """Is tile (i, j) inside the area opened by the stopped flood"""
+        if not self._pending:
+            return False
+        top, left, bottom, right = self._pending_area
+        return top <= i <= bottom and left <= j <= right
+
+    def continue_flood(self):
+        """Opens up to max_flood more tiles of the flood that was stopped last. Returns a list of the (i, j) indices of
+        every tile that changed"""
+        if self.exploded or not self._pending:
+            return []
+        queue, self._pending = self._pending, deque()
+        return self._flood_fill(queue, self._pending_area)
+
+    def _flood_fill(self, queue, area):
+        """Reveals tiles outwards from the empty tiles in queue without recursion, stopping at numbers and flags and
+        after max_flood tiles. The queue is worked through first in first out so the flood grows evenly in every
+        direction. If the flood is stopped the tiles left in the queue are kept for continue_flood(), replacing any
+        older stopped flood, and area is grown to cover the opened tiles"""
+        opened = []
+        while queue and len(opened) < self.max_flood:
+            i, j = queue.popleft()
+            for di, dj in Board.neighbours:
+                chunk, k = self._locate(i + di, j + dj)
+                if not chunk.top[k]:
+                    chunk.top[k] = 1
+                    chunk.touched = True
+                    opened.append((i + di, j + dj))
+                    if not chunk.bottom[k]:
+                        queue.append((i + di, j + dj))
+        self._n_revealed += len(opened)
+        if queue:
+            while len(queue) > self.max_flood:
+                queue.pop()  # the newest tiles are furthest out, the flood can no longer be carried on from them
+            for i, j in opened:
+                area[0], area[1] = min(area[0], i), min(area[1], j)
+                area[2], area[3] = max(area[2], i), max(area[3], j)
+            self._pending, self._pending_area = queue, area
+        return opened
+
+    def place_flag(self, i, j):
+        """Places or removes a flag. Returns a list of the (i, j) indices of every tile that changed"""
+        if self.exploded:
+            return []
+        chunk, k = self._locate(i, j)
+        if chunk.top[k] == 1:  # change flag if not revealed
+            return []
+        chunk.top[k] = 2 - chunk.top[k]
+        chunk.touched = True
+        self._n_flags += 1 if chunk.top[k] else -1
+        return [(i, j)]
+
+    def reveal_many(self, tiles):
+        """Reveals every (i, j) in tiles, stopping if a mine is hit"""
+        changed = []
+        for i, j in tiles:
+            changed += self.reveal_tile(i, j)
+        return changed
+
+    def flag_many(self, tiles):
+        """Places a flag on every (i, j) in tiles that is not already flagged or revealed"""
+        changed = []
+        for i, j in tiles:
+            if not self.top(i, j):
+                changed += self.place_flag(i, j)
+        return changed
+
+    def save(self):
+        """Writes every touched chunk in memory to the store"""
+        for key, chunk in self.chunks.items():
+            if chunk.touched:
+                self.store.save(key, chunk.top)
+
+    def close(self):
+        """Saves the chunks in memory and closes the store"""
+        self.save()
+        self.store.close()
@@ -1,62 +1,100 @@
 import pygame as pg
-from random import randint as rand
 from math import floor
 
+from data import assets, core
 
-class Board:
-    """Stores minesweeper information and handles interaction such as placing a flag or revealing a tile (input is
-     handled separately)"""
-    neighbours = [[-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [-1, 1], [1, -1], [1, 1]]
-    colours = {1: 'blue', 2: 'darkgreen', 3: 'red', 4: 'purple', 5: ' maroon', 6: 'turquoise', 7: 'black', 8: 'gray'}
-    difficulties = {'easy': [10, 10, 10], 'intermediate': [40, 16, 16], 'expert': [99, 30, 16]}
-
-    def __init__(self, difficulty='easy', tile_size=32):
-        """Boards are created in the create_new() function. Many variables are stored as a property as they can be
-        calculated from the top_board and bottom_board variables"""
-        self.top = None
-        self.bottom = None
 
-        settings = Board.difficulties[difficulty]
-        self.create_new(settings[1], settings[2], settings[0])
+class Board(core.Board):
+    """Minesweeper board that can be drawn with pygame. The rules are in data.core.Board, this class keeps track of
+    which tiles changed so the board can be redrawn without drawing every tile. Every look a tile can have is drawn
+    once into a sprite atlas, so drawing tiles is one Surface.blits call with an area of the atlas for each tile"""
+    colours = {1: 'blue', 2: 'darkgreen', 3: 'red', 4: 'purple', 5: ' maroon', 6: 'turquoise', 7: 'black', 8: 'gray'}
+    paths = {'mine': 'img/mine.png', 'tile': 'img/Tile.png', 'bad_mine': 'img/Bad_Mine.png', 'flag': 'img/Flag.png'}
+    heat_levels = 10  # shades of the probability overlay between safe and certain mine
+    # columns of the sprite atlas, see images(). Revealed tiles are found by their bottom value and covered tiles with a
+    # probability by heat_sprite plus their heat level
+    covered_sprite = 0
+    flag_sprite = 1
+    sprite_columns = {0: 2, 1: 3, 2: 4, 3: 5, 4: 6, 5: 7, 6: 8, 7: 9, 8: 10, -1: 11, -2: 12, -3: 13}
+    heat_sprite = 14
+
+    def __init__(self, difficulty='easy', tile_size=32, use_array=False, debug=False):
+        """See data.core.Board for the board options. tile_size is the width of a tile in pixels"""
+        # rendering, the board is drawn once to surface and then only changed tiles are redrawn
+        self.surface = None
+        self._dirty = set()
+        self._redraw_all = True
+        self.tiles_drawn = 0  # tiles drawn by the last draw, shown by the profiler overlay
+        self.probabilities = None  # (i, j): chance of a mine, drawn over covered tiles, see show_probabilities()
+
+        super().__init__(difficulty, use_array, debug)
 
         self.tile_size = tile_size
 
-        self.font = pg.font.SysFont('', tile_size)
-        self.mine_img = pg.transform.scale(pg.image.load('img/mine.png'), (self.tile_size, self.tile_size))
-        self.tile_img = pg.transform.scale(pg.image.load('img/tile.png'), (self.tile_size, self.tile_size))
-        self.bad_mine_img = pg.transform.scale(pg.image.load('img/bad_mine.png'), (self.tile_size, self.tile_size))
-        self.flag_img = pg.transform.scale(pg.image.load('img/flag.png'), (self.tile_size, self.tile_size))
-
-    def create_new(self, width, height, mines):
-        """Creates a new top board and bottom board and places mines in random locations"""
-        # create empty boards
-        self.top = [[0] * width for _ in range(height)]
-        self.bottom = [[0] * width for _ in range(height)]
-
-        # place mines
-        mines_placed = 0
-        while mines_placed < mines:
-            i, j = rand(0, height-1), rand(0, width-1)
-            if not self.bottom[i][j]:
-                self.bottom[i][j] = -1
-                mines_placed += 1
-
-        # count adjacent mines
-        for i in range(height):
-            for j in range(width):
-                if self.bottom[i][j] != -1:
-                    self.bottom[i][j] = sum(  # sum of adjacent mines from list of booleans that is created
-                        [self.bottom[i + neighbour[0]][j + neighbour[1]] == -1 for neighbour in Board.neighbours if
-                         self.index_in_board(i + neighbour[0], j + neighbour[1])])  # if inside of board
-
-    def reset(self):
-        """Creates a new board using the current boards settings"""
-        self.create_new(self.width, self.height, self.n_mines)
+        images = self.images(tile_size)
+        self.font = images['font']
+        self.mine_img = images['mine']
+        self.tile_img = images['tile']
+        self.bad_mine_img = images['bad_mine']
+        self.flag_img = images['flag']
+        self.number_imgs = images['numbers']
+
+        # the camera used in the last draw and its position, when either changes the visible tiles are redrawn
+        self._last_view = None
+
+    def create_new(self, width, height, mines, seed=None, safe_first_click=False):
+        """Creates a new board and marks the whole board to be redrawn"""
+        super().create_new(width, height, mines, seed, safe_first_click)
+        self._dirty.clear()
+        self._redraw_all = True
+        if self.probabilities is not None:
+            self.probabilities = {}  # the overlay stays on but is empty until it is given the new board's
 
-    @property
-    def width(self):
-        """Returns width of current board"""
-        return len(self.bottom[0])
+    def reveal_tile(self, i, j):
+        """Reveals a tile and marks the changed tiles to be redrawn"""
+        changed = super().reveal_tile(i, j)
+        self._dirty.update(changed)
+        return changed
+
+    def place_flag(self, i, j):
+        """Places a flag and marks the tile to be redrawn"""
+        changed = super().place_flag(i, j)
+        self._dirty.update(changed)
+        return changed
+
+    def reveal_many(self, tiles):
+        """Reveals tiles and marks the changed tiles to be redrawn"""
+        changed = super().reveal_many(tiles)
+        self._dirty.update(changed)
+        return changed
+
+    def flag_many(self, tiles):
+        """Places flags and marks the changed tiles to be redrawn"""
+        changed = super().flag_many(tiles)
+        self._dirty.update(changed)
+        return changed
+
+    def reveal_board(self, list_changed=True):
+        """Reveals the board and marks the whole board to be redrawn"""
+        changed = super().reveal_board(list_changed)
+        self._redraw_all = True
+        return changed
+
+    def show_probabilities(self, probabilities):
+        """Draws a heat map of probabilities, a dict of (i, j): chance of a mine such as the one from
+        data.probability.ProbabilityEngine, over the covered tiles. None turns the overlay off. Only tiles whose shade
+        changed are redrawn"""
+        old, self.probabilities = self.probabilities, probabilities
+        if old is None or probabilities is None:
+            if old is not probabilities:
+                self._redraw_all = True
+            return
+        for tile in old.keys() | probabilities.keys():
+            if self._heat_level(old.get(tile)) != self._heat_level(probabilities.get(tile)):
+                self._dirty.add(tile)
+
+    def _heat_level(self, probability):
+        return None if probability is None else round(probability * self.heat_levels)
 
     @property
     def image_width(self):
@@ -66,106 +104,152 @@ class Board:
     def image_height(self):
         return self.height*self.tile_size
 
-    @property
-    def height(self):
-        """Returns length of current board"""
-        return len(self.bottom)
-
-    @property
-    def n_mines(self):
-        """The number of mines in current board"""
-        return sum([row.count(-1) + row.count(-2) for row in self.bottom])
-
-    @property
-    def n_flags(self):
-        """The number of flags placed in current board"""
-        return sum([row.count(2) for row in self.top])
-
-    @property
-    def exploded(self):
-        """Have any of the mines have been revealed"""
-        return any(-2 in row for row in self.bottom)
-
-    @property
-    def solved(self):
-        """Is the number of unrevealed tiles equal to the number of mines"""
-        return self.n_mines == self.width*self.height - sum([row.count(1) for row in self.top])
-
-    def reveal_tile(self, i, j):
-        """Reveals tile using index and if there is no adjacent mines will clear all adjacent tiles"""
-        if self.index_in_board(i, j):
-            if self.top[i][j] != 2:  # reveal unless flag is placed
-                self.top[i][j] = 1
-                if self.bottom[i][j] == -1:  # if revealed is mine set mine to hit and reveal board
-                    self.bottom[i][j] = -2
-                    self.reveal_board()
-                elif not self.bottom[i][j]:  # if revealed empty reveal all neighbours
-                    for neighbour in [item for item in self.neighbours if self.index_in_board(i+item[0], j+item[1])]:
-                        if not self.top[i+neighbour[0]][j+neighbour[1]]:
-                            self.reveal_tile(i+neighbour[0], j + neighbour[1])
-
-    def place_flag(self, i, j):
-        """Places a flag on top board"""
-        if self.index_in_board(i, j):
-            if self.top[i][j] != 1:  # change flag if not revealed
-                self.top[i][j] = 2 - self.top[i][j]
-
-    def reveal_board(self):
-        """Will reveal entire board except on flags that are on mines. Flags not on mines will become bad mines"""
-        for i, row in enumerate(self.top):
-            for j, item in enumerate(row):
-                if not (item == 2 and self.bottom[i][j] == -1):  # reveal unless mine is flagged
-                    self.top[i][j] = 1
-                    if item == 2:  # if incorrectly flagged set as bad mine
-                        self.bottom[i][j] = -3
-
-    def index_in_board(self, i, j):
-        """Checks if index is within the limits of the board"""
-        return 0 <= i < self.height and 0 <= j < self.width
-
-    def mouse_to_index(self, offset):
-        """Converts mouse position to coordinate on board. Offset is the (x, y) distance from board to display"""
-        # NEED TO IMPLEMENT A FEATURE THAT WILL ADD ON ANY PIXELS IF BOARD IS NOT AT THE TOP LEFT OF SCREEN
+    def images(self, size):
+        """Returns the tile images and number images scaled for tiles of size pixels and the sprite atlas built from
+        them. The images are shared with every other board of the same class through data.assets so they are only
+        made once for each size"""
+        return assets.sprites((type(self), size), lambda: self._build_images(size))
+
+    def _build_images(self, size):
+        images = {name: assets.scaled(path, size) for name, path in Board.paths.items()}
+        images['font'] = assets.font('', size)
+        images['numbers'] = {n: assets.text(images['font'], str(n), colour, True)
+                             for n, colour in Board.colours.items()}
+        # see through squares from green for safe through yellow to red for a mine, one per heat level
+        images['heat'] = []
+        for level in range(self.heat_levels + 1):
+            heat = pg.Surface((size, size), pg.SRCALPHA)
+            shade = level / self.heat_levels
+            heat.fill((min(255, round(510 * shade)), min(255, round(510 * (1 - shade))), 0, 110))
+            images['heat'].append(heat)
+        images['atlas'], images['areas'] = self._build_atlas(images, size)
+        return images
+
+    def _build_atlas(self, images, size):
+        """Draws every look a tile can have side by side with the grid lines baked in. There are four rows of sprites,
+        row 2*(i > 0) + (j > 0) is for tile (i, j) as only tiles after the first row and column have a top and a left
+        edge. Returns the atlas and areas[row][column], the rect of each sprite"""
+        columns = self.heat_sprite + self.heat_levels + 1
+        atlas = pg.Surface((columns * size, 4 * size))
+        atlas.fill(pg.Color('white'))
+        for row in range(4):
+            y = row * size
+            for bot, column in Board.sprite_columns.items():
+                x = column * size
+                atlas.set_clip((x, y, size, size))  # numbers are tall enough to spill onto the sprite below
+                if bot in images['numbers']:
+                    atlas.blit(images['numbers'][bot], (x + 0.35*size, y + 0.2*size))
+                elif bot == -1:
+                    atlas.blit(images['mine'], (x, y))
+                elif bot == -2:
+                    atlas.fill(pg.Color('red'), (x, y, size, size))
+                    atlas.blit(images['mine'], (x, y))
+                elif bot == -3:
+                    atlas.blit(images['bad_mine'], (x, y))
+            atlas.set_clip(None)
+            for column in [self.covered_sprite, self.flag_sprite] + list(range(self.heat_sprite, columns)):
+                atlas.blit(images['tile'], (column * size, y))
+            atlas.blit(images['flag'], (self.flag_sprite * size, y))
+            for level, heat in enumerate(images['heat']):
+                atlas.blit(heat, ((self.heat_sprite + level) * size, y))
+            # Draw the top and left edges of the grid, the bottom and right edges belong to the next tiles
+            for column in range(columns):
+                x = column * size
+                if row & 2:
+                    pg.draw.line(atlas, pg.Color('black'), (x, y), (x + size - 1, y))
+                if row & 1:
+                    pg.draw.line(atlas, pg.Color('black'), (x, y), (x, y + size - 1))
+        if pg.display.get_surface() is not None:
+            atlas = atlas.convert()
+        areas = [[pg.Rect(column * size, row * size, size, size) for column in range(columns)] for row in range(4)]
+        return atlas, areas
+
+    def _tile_blits(self, tiles, x, y, size, images):
+        """The (atlas, position, area) of every (i, j) in tiles for Surface.blits, with tile (0, 0) at (x, y)"""
+        atlas, areas = images['atlas'], images['areas']
+        top, bottom, probabilities = self.top, self.bottom, self.probabilities
+        columns = Board.sprite_columns
+        blits = []
+        for i, j in tiles:
+            state = top[i][j]
+            if state == 1:
+                column = columns[bottom[i][j]]
+            elif state == 2:
+                column = self.flag_sprite
+            elif probabilities and (i, j) in probabilities:
+                column = self.heat_sprite + self._heat_level(probabilities[i, j])
+            else:
+                column = self.covered_sprite
+            blits.append((atlas, (x + j*size, y + i*size), areas[2*(i > 0) + (j > 0)][column]))
+        return blits
+
+    def mouse_to_index(self, offset, camera=None):
+        """Converts mouse position to coordinate on board. Offset is the (x, y) distance from board to display. If a
+        camera is given the position is converted through the camera instead"""
         mouse_pos = pg.mouse.get_pos()
+        if camera is not None:
+            return camera.screen_to_index(mouse_pos, self)
         return floor((mouse_pos[1] - offset[1]) / self.tile_size), floor((mouse_pos[0] - offset[0]) / self.tile_size)
 
-    def draw(self, display):
-        """Renders the board using Pygame to the selected display"""
-        for i, row in enumerate(self.bottom):
-            for j, bot in enumerate(row):
-                # DRAW BOTTOM BOARD
-                # Draws adjacent mine numbers
-                if bot in Board.colours:
-                    display.blit(self.font.render(str(bot), True, pg.Color(Board.colours[bot])),  # number image
-                                 ((j + 0.35) * self.tile_size, (i + 0.2) * self.tile_size))  # number location
-                # Draw mines
-                if bot == -1:
-                    display.blit(self.mine_img, (j*self.tile_size, i*self.tile_size))
-                # Draw hit mines
-                if bot == -2:
-                    pg.draw.rect(display,
-                                 pg.Color('red'),
-                                 (j*self.tile_size, i*self.tile_size, self.tile_size, self.tile_size))
-                    display.blit(self.mine_img, (j*self.tile_size, i*self.tile_size))
-                # Draw bad mines
-                if bot == -3:
-                    display.blit(self.bad_mine_img, (j*self.tile_size, i*self.tile_size))
-
-                # DRAW TOP BOARD AND GRID
-                top = self.top[i][j]
-                if top != 1:
-                    display.blit(self.tile_img, (j*self.tile_size, i*self.tile_size))
-                if top == 2:
-                    display.blit(self.flag_img, (j*self.tile_size, i*self.tile_size))
-                # Draw grid
-                if i > 0:
-                    pg.draw.line(display,
-                                 pg.Color('black'),
-                                 (0, i*self.tile_size),
-                                 (self.width*self.tile_size, i*self.tile_size),
-                                 1)
-                if j > 0:
-                    pg.draw.line(display,
-                                 pg.Color('black'),
-                                 (j*self.tile_size, 0),
-                                 (j*self.tile_size, self.height*self.tile_size))
+    def draw(self, display, camera=None):
+        """Renders the board using Pygame to the selected display. Only tiles that have changed since the last call are
+        redrawn and copied to the display. Returns the list of rects of the display that were changed so they can be
+        passed to pg.display.update(). If a camera is given only the tiles inside its view are drawn"""
+        if camera is not None:
+            return self._draw_view(display, camera)
+        self._last_view = None
+
+        if self._redraw_all or self.surface is None or self.surface.get_size() != (self.image_width,
+                                                                                    self.image_height):
+            self._render_board()
+            self.tiles_drawn = self.width * self.height
+            display.blit(self.surface, (0, 0))
+            return [self.surface.get_rect()]
+
+        if not self._dirty:
+            self.tiles_drawn = 0
+            return []
+        size = self.tile_size
+        self.surface.blits(self._tile_blits(self._dirty, 0, 0, size, self.images(size)), doreturn=False)
+        rects = [pg.Rect(j*size, i*size, size, size) for i, j in self._dirty]
+        display.blits([(self.surface, rect, rect) for rect in rects], doreturn=False)
+        self.tiles_drawn = len(self._dirty)
+        self._dirty.clear()
+        return rects
+
+    def _draw_view(self, display, camera):
+        """Draws the tiles that can be seen through the camera straight to the display. The whole view is only drawn
+        when the camera has moved or the board has been replaced, otherwise only the changed tiles in view are"""
+        size = camera.tile_size(self)
+        images = self.images(size)
+        first_i, last_i, first_j, last_j = camera.visible_range(self)
+        left, top = camera.rect.x - camera.x, camera.rect.y - camera.y  # display position of tile (0, 0)
+
+        clip = display.get_clip()
+        display.set_clip(camera.rect)
+        view = camera.rect.topleft, camera.rect.size, camera.x, camera.y, size
+        if self._redraw_all or view != self._last_view:
+            display.fill(pg.Color('white'), camera.rect)
+            tiles = [(i, j) for i in range(first_i, last_i) for j in range(first_j, last_j)]
+            display.blits(self._tile_blits(tiles, left, top, size, images), doreturn=False)
+            rects = [camera.rect.copy()]
+            self.tiles_drawn = (last_i - first_i) * (last_j - first_j)
+            self._last_view = view
+            self._redraw_all = False
+        else:
+            tiles = [(i, j) for i, j in self._dirty if first_i <= i < last_i and first_j <= j < last_j]
+            display.blits(self._tile_blits(tiles, left, top, size, images), doreturn=False)
+            rects = [pg.Rect(left + j*size, top + i*size, size, size).clip(camera.rect) for i, j in tiles]
+            self.tiles_drawn = len(rects)
+        display.set_clip(clip)
+        self._dirty.clear()
+        return rects
+
+    def _render_board(self):
+        """Draws every tile to the board surface"""
+        if self.surface is None or self.surface.get_size() != (self.image_width, self.image_height):
+            self.surface = pg.Surface((self.image_width, self.image_height))
+        tiles = [(i, j) for i in range(self.height) for j in range(self.width)]
+        self.surface.blits(self._tile_blits(tiles, 0, 0, self.tile_size, self.images(self.tile_size)), doreturn=False)
+        self._dirty.clear()
+        self._redraw_all = False
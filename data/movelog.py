@@ -0,0 +1,165 @@
+"""Compact binary logs of games that can be replayed.
+
+A log file starts with a file header (magic and version) followed by the games one after another. Each game is a
+fixed size game header (width, height, mines, seed, options and number of moves) followed by that many fixed size move
+records (ms since the last move, op, i, j). Everything is little endian. The mines of a game are made again from its
+seed so only the moves need storing.
+
+Files are only ever appended to, so several runs can record to the same archive. Reading maps the file with mmap and
+unpacks moves straight from the mapped memory, a game is never copied into Python objects unless it is replayed.
+"""
+import mmap
+import os
+import struct
+
+from data.core import Board
+
+FILE_HEADER = struct.Struct('<4sH')  # magic, version
+GAME_HEADER = struct.Struct('<HHIQBI')  # width, height, mines, seed, options, number of moves
+MOVE = struct.Struct('<IBHH')  # ms since the last move, op, i, j
+MAGIC = b'MSWL'
+VERSION = 1
+
+# ops
+REVEAL = 0
+FLAG = 1
+
+# game header options
+SAFE_FIRST_CLICK = 1
+USE_ARRAY = 2  # array boards place different mines for the same seed
+
+
+class LogWriter:
+    """Appends games to a log file. The moves of the current game are kept in memory and the whole game is written
+    with one call when it ends, so a game is never left half written in the file"""
+
+    def __init__(self, path, buffering=1 << 16):
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self.file = open(path, 'ab', buffering=buffering)
+        if new:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.header = None
+        self.moves = bytearray()
+        self.n_moves = 0
+
+    def start_game(self, width, height, mines, seed, safe_first_click=False, use_array=False):
+        """Ends the current game and starts recording a new one. A seed is needed as the mines are not stored"""
+        if seed is None:
+            raise ValueError('games need a seed to be logged')
+        self.end_game()
+        options = (SAFE_FIRST_CLICK if safe_first_click else 0) | (USE_ARRAY if use_array else 0)
+        self.header = width, height, mines, seed, options
+
+    def start_board(self, board):
+        """Starts recording a new game with the settings of board"""
+        self.start_game(board.width, board.height, board.n_mines, board.seed, board.safe_first_click,
+                        board.use_array)
+
+    def add(self, op, i, j, dt=0):
+        """Records a move of the current game, dt is the ms since the last move"""
+        self.moves += MOVE.pack(min(dt, 0xffffffff), op, i, j)
+        self.n_moves += 1
+
+    def end_game(self):
+        """Writes the current game to the file, games without moves are not written"""
+        if self.header is not None and self.n_moves:
+            self.file.write(GAME_HEADER.pack(*self.header, self.n_moves) + self.moves)
+        self.header = None
+        self.moves = bytearray()
+        self.n_moves = 0
+
+    def close(self):
+        self.end_game()
+        self.file.close()
+
+
+class LoggedGame:
+    """A game in a log. data is a memoryview of its move records in the mapped file"""
+    __slots__ = ('width', 'height', 'mines', 'seed', 'safe_first_click', 'use_array', 'data')
+
+    def __init__(self, width, height, mines, seed, options, data):
+        self.width = width
+        self.height = height
+        self.mines = mines
+        self.seed = seed
+        self.safe_first_click = bool(options & SAFE_FIRST_CLICK)
+        self.use_array = bool(options & USE_ARRAY)
+        self.data = data
+
+    def __len__(self):
+        return len(self.data) // MOVE.size
+
+    def moves(self):
+        """Iterates over the (dt, op, i, j) moves of the game"""
+        return MOVE.iter_unpack(self.data)
+
+    def moves_array(self):
+        """The moves as a numpy structured array with fields dt, op, i and j. The array uses the mapped file so no
+        data is copied"""
+        import numpy as np
+        dtype = np.dtype([('dt', '<u4'), ('op', 'u1'), ('i', '<u2'), ('j', '<u2')])
+        return np.frombuffer(self.data, dtype=dtype)
+
+
+class LogReader:
+    """Reads a log file through mmap. Iterating gives a LoggedGame for every game in the file, a game cut short by the
+    end of the file is skipped"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        if len(self.view) < FILE_HEADER.size or FILE_HEADER.unpack_from(self.view)[0] != MAGIC:
+            self.close()
+            raise ValueError('{} is not a move log'.format(path))
+
+    def __iter__(self):
+        view = self.view
+        position = FILE_HEADER.size
+        while position + GAME_HEADER.size <= len(view):
+            width, height, mines, seed, options, n_moves = GAME_HEADER.unpack_from(view, position)
+            start = position + GAME_HEADER.size
+            position = start + n_moves * MOVE.size
+            if position > len(view):
+                break
+            yield LoggedGame(width, height, mines, seed, options, view[start:position])
+
+    def close(self):
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            pass  # games read from the file are still in use, the map is closed when they are freed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def replay(game, board=None):
+    """Plays the moves of a LoggedGame on a data.core.Board as fast as possible and returns the board. Pass a board to
+    reuse it between games"""
+    if board is None:
+        board = Board(use_array=game.use_array)
+    board.create_new(game.width, game.height, game.mines, game.seed, game.safe_first_click)
+    reveal, flag = board.reveal_tile, board.place_flag
+    for dt, op, i, j in game.moves():
+        if op == REVEAL:
+            reveal(i, j)
+        else:
+            flag(i, j)
+    return board
+
+
+def replay_file(path):
+    """Replays every game of a log, yielding each LoggedGame and the board after its last move. The same board is
+    reused for every game so it is only valid until the next game"""
+    boards = {}
+    with LogReader(path) as reader:
+        for game in reader:
+            if game.use_array not in boards:
+                boards[game.use_array] = Board(use_array=game.use_array)
+            board = replay(game, boards[game.use_array])
+            yield game, board
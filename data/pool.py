@@ -0,0 +1,129 @@
+import os
+import struct
+import threading
+from random import Random
+
+from data.core import Board
+from data.solver import Solver
+
+RECORD = struct.Struct('<QHH')  # seed, start i, start j
+MAX_ATTEMPTS = 2000
+
+_pools = {}
+
+
+def no_guess(board, start):
+    """Reveals start and plays the board with the solver. Returns True if the solver wins without guessing"""
+    board.reveal_tile(*start)
+    solver = Solver(board)
+    while not board.exploded and not board.solved:
+        solver.step()
+        if solver.guesses:
+            return False
+    return board.solved
+
+
+def generate(width, height, mines, use_array=False, rng=None, max_attempts=MAX_ATTEMPTS):
+    """Makes random safe_first_click boards until one can be solved without guessing from a random start tile.
+    Returns its (seed, i, j), or None if none of max_attempts boards could be"""
+    rng = rng or Random()
+    board = Board(use_array=use_array)
+    for _ in range(max_attempts):
+        seed = rng.getrandbits(63)
+        start = rng.randrange(height), rng.randrange(width)
+        board.create_new(width, height, mines, seed, safe_first_click=True)
+        if no_guess(board, start):
+            return (seed,) + start
+    return None
+
+
+class BoardPool:
+    """A stack of no-guess boards for one board setting. A board is stored as its seed and start tile, revealing the
+    start tile of a safe_first_click board made from the seed gives a board that can be solved without guessing.
+
+    The boards are kept in a file of fixed size records so taking one is a pop from the end of a list and a truncate
+    of the file. A background thread makes new boards whenever the pool has less than target. If the pool is empty
+    take() waits up to wait seconds for the thread, boards of the usual sizes take far less than that to make"""
+
+    def __init__(self, width, height, mines, folder='pools', use_array=False, target=20, wait=0.5):
+        self.width = width
+        self.height = height
+        self.mines = mines
+        self.use_array = use_array
+        self.target = target
+        self.wait = wait
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, '{}x{}x{}{}.pool'.format(width, height, mines, '-array' if use_array else ''))
+
+        self.lock = threading.Lock()
+        self.added = threading.Condition(self.lock)  # notified when a board is added or the pool gives up
+        self.boards = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as file:
+                data = file.read()
+            if len(data) % RECORD.size:  # the game closed part way through writing a board
+                data = data[:len(data) - len(data) % RECORD.size]
+                os.truncate(self.path, len(data))
+            self.boards = list(RECORD.iter_unpack(data))
+
+        self.thread = None
+        self.stopping = False
+        self.impossible = False  # set if no board could be made, the setting is too dense to solve without guessing
+
+    def __len__(self):
+        return len(self.boards)
+
+    def take(self):
+        """Returns the (seed, i, j) of a board, or None if the pool is still empty after waiting for the background
+        thread or the setting is impossible. The caller then uses a random board"""
+        self.refill()
+        with self.added:
+            if not self.boards and not self.impossible:
+                self.added.wait_for(lambda: self.boards or self.impossible, self.wait)
+            record = self.boards.pop() if self.boards else None
+            if record is not None:
+                os.truncate(self.path, len(self.boards) * RECORD.size)
+        self.refill()
+        return record
+
+    def add(self, record):
+        with self.added:
+            self.boards.append(record)
+            with open(self.path, 'ab') as file:
+                file.write(RECORD.pack(*record))
+            self.added.notify_all()
+
+    def refill(self):
+        """Starts the background thread if the pool needs more boards"""
+        if len(self) < self.target and not self.impossible and not (self.thread and self.thread.is_alive()):
+            self.stopping = False
+            self.thread = threading.Thread(target=self._refill, daemon=True)
+            self.thread.start()
+
+    def _refill(self):
+        rng = Random()
+        while not self.stopping and len(self) < self.target:
+            record = generate(self.width, self.height, self.mines, self.use_array, rng)
+            if record is None:
+                with self.added:
+                    self.impossible = True
+                    self.added.notify_all()
+                return
+            self.add(record)
+
+    def stop(self):
+        """Stops the background thread after the board it is making"""
+        self.stopping = True
+        if self.thread is not None:
+            self.thread.join()
+
+
+def get_pool(width, height, mines, use_array=False):
+    """The shared pool of a board setting, made and started filling the first time it is asked for"""
+    key = width, height, mines, use_array
+    pool = _pools.get(key)
+    if pool is None:
+        pool = BoardPool(width, height, mines, use_array=use_array)
+        _pools[key] = pool
+        pool.refill()
+    return pool
@@ -0,0 +1,290 @@
+from collections import OrderedDict
+from math import comb
+
+from data.core import Board
+
+
+class ProbabilityEngine:
+    """Works out the exact chance that each unrevealed tile is a mine from the revealed numbers, the flags (which are
+    taken to be right) and the number of mines left.
+
+    The unrevealed tiles next to numbers are split into components, groups of tiles joined by the numbers they share.
+    Each component is counted on its own: its tiles are put in an order where each number's tiles are close together
+    and the ways of placing k mines are counted a tile at a time, keeping only the mines placed so far on the numbers
+    that are partly filled. Counting forwards and backwards gives how many of the ways have each tile as a mine
+    without listing the ways one by one. The components are then weighed against each other and against the tiles
+    away from the numbers by how many ways the rest of the mines can be placed.
+
+    A component's counts only depend on its numbers and tiles so they are cached, after a move only the components it
+    touched are counted again"""
+
+    def __init__(self, cache_size=512):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # component key: (tiles, ways, mine ways per tile)
+        self.probabilities = {}
+
+    def update(self, board):
+        """Returns a dict of (i, j): chance of a mine for every tile that is not revealed or flagged. The dict is empty
+        if the flags and numbers cannot all be right"""
+        top, bottom = board.top, board.bottom
+        height, width = board.height, board.width
+        unknown = 0
+        constraints = []
+        touching = {}  # unrevealed tile: constraints it is in
+        for i in range(height):
+            for j in range(width):
+                if top[i][j] != 1:
+                    unknown += not top[i][j]
+                    continue
+                if bottom[i][j] <= 0:
+                    continue
+                tiles = []
+                need = bottom[i][j]
+                for di, dj in Board.neighbours:
+                    a, b = i + di, j + dj
+                    if 0 <= a < height and 0 <= b < width:
+                        if top[a][b] == 2:
+                            need -= 1
+                        elif not top[a][b]:
+                            tiles.append((a, b))
+                if tiles or need:
+                    if not 0 <= need <= len(tiles):
+                        self.probabilities = {}
+                        return self.probabilities
+                    for tile in tiles:
+                        touching.setdefault(tile, []).append(len(constraints))
+                    constraints.append((tuple(tiles), need))
+
+        components = [self._count(group) for group in self._components(constraints, touching)]
+        mines_left = board.n_mines - board.n_flags
+        others = unknown - len(touching)  # unrevealed tiles away from the numbers
+        self.probabilities = self._combine(components, mines_left, others)
+        if self.probabilities and others:
+            chance = self.probabilities.pop(None)
+            for i in range(height):
+                for j in range(width):
+                    if not top[i][j] and (i, j) not in touching:
+                        self.probabilities[(i, j)] = chance
+        return self.probabilities
+
+    @staticmethod
+    def _components(constraints, touching):
+        """Splits the constraints into groups that share tiles"""
+        seen = [False] * len(constraints)
+        for start in range(len(constraints)):
+            if seen[start]:
+                continue
+            seen[start] = True
+            group = [constraints[start]]
+            stack = [start]
+            while stack:
+                for tile in constraints[stack.pop()][0]:
+                    for other in touching[tile]:
+                        if not seen[other]:
+                            seen[other] = True
+                            group.append(constraints[other])
+                            stack.append(other)
+            yield group
+
+    def _count(self, group):
+        """Returns the tiles of a component, the number of ways of placing k mines in it and for every tile the
+        number of those ways with a mine on the tile, using the cache if the component has not changed"""
+        key = tuple(sorted(group))
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            return result
+        result = count_component(group)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _combine(components, mines_left, others):
+        """Weighs every component's mine count against the others and against the ways of placing the remaining mines
+        on the other tiles. The chance of a mine on the other tiles is stored under None"""
+        # ways of placing s mines in components before and after each component
+        before = [{0: 1}]
+        for tiles, ways, mine_ways in components:
+            before.append(_multiply(before[-1], ways))
+        after = [{0: 1}]
+        for tiles, ways, mine_ways in reversed(components):
+            after.append(_multiply(after[-1], ways))
+        after.reverse()
+
+        total = sum(count * comb(others, mines_left - s) for s, count in before[-1].items() if s <= mines_left)
+        if not total:
+            return {}
+        probabilities = {}
+        for n, (tiles, ways, mine_ways) in enumerate(components):
+            rest = _multiply(before[n], after[n + 1])
+            weight = {k: sum(count * comb(others, mines_left - k - s) for s, count in rest.items()
+                             if k + s <= mines_left) for k in ways}
+            for tile, tile_ways in zip(tiles, mine_ways):
+                probabilities[tile] = sum(count * weight[k] for k, count in tile_ways.items()) / total
+        if others:
+            probabilities[None] = sum(count * comb(others - 1, mines_left - s - 1) for s, count in before[-1].items()
+                                      if s < mines_left) / total
+        return probabilities
+
+
+def _multiply(a, b):
+    """Product of two polynomials stored as {power: coefficient}"""
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def _simplify(group):
+    """Settles the tiles of numbers that need none or all of their tiles, again and again until no more can be. Returns
+    the constraints left over, the tiles that must be mines and the tiles that must be safe, or None if the numbers
+    cannot all be right"""
+    mines, safe = set(), set()
+    changed = True
+    while changed:
+        changed = False
+        left = []
+        for tiles, need in group:
+            need -= sum(tile in mines for tile in tiles)
+            tiles = tuple(tile for tile in tiles if tile not in mines and tile not in safe)
+            if not 0 <= need <= len(tiles):
+                return None
+            if tiles and need in (0, len(tiles)):
+                (mines if need else safe).update(tiles)
+                changed = True
+            elif tiles:
+                left.append((tiles, need))
+        group = left
+    return group, mines, safe
+
+
+def _width(tiles, group):
+    """The most constraints that are part filled at once when the tiles are counted in this order, and the total"""
+    index = {tile: k for k, tile in enumerate(tiles)}
+    opened = [0] * (len(tiles) + 1)
+    for constraint_tiles, need in group:
+        positions = [index[tile] for tile in constraint_tiles]
+        opened[min(positions) + 1] += 1
+        opened[max(positions) + 1] -= 1
+    most = total = running = 0
+    for change in opened:
+        running += change
+        most = max(most, running)
+        total += running
+    return most, total
+
+
+def _order(group):
+    """Puts the tiles of a component in the order that keeps the fewest constraints part filled at once. Tries a breadth
+    first walk through the constraints, which follows a long thin frontier, and sweeps across the rows and across the
+    columns, which suit a wide patch of scattered numbers"""
+    touching = {}
+    for n, (tiles, need) in enumerate(group):
+        for tile in tiles:
+            touching.setdefault(tile, []).append(n)
+    walk = []
+    placed = set()
+    done = set()
+    for start in sorted(touching, key=lambda tile: len(touching[tile])):
+        if start in placed:
+            continue
+        placed.add(start)
+        k = len(walk)
+        walk.append(start)
+        while k < len(walk):
+            for n in touching[walk[k]]:
+                if n not in done:
+                    done.add(n)
+                    for tile in group[n][0]:
+                        if tile not in placed:
+                            placed.add(tile)
+                            walk.append(tile)
+            k += 1
+    rows = sorted(touching)
+    columns = sorted(touching, key=lambda tile: (tile[1], tile[0]))
+    return min((walk, rows, columns), key=lambda tiles: _width(tiles, group))
+
+
+def count_component(group):
+    """Counts the mine placements of one component of (tiles, mines needed) constraints. Returns the ordered tiles, a
+    dict of mines: ways and for each tile a dict of mines: ways with a mine on that tile"""
+    simplified = _simplify(group)
+    if simplified is None:
+        return [], {}, []
+    group, settled_mines, settled_safe = simplified
+    tiles = _order(group) if group else []
+    index = {tile: k for k, tile in enumerate(tiles)}
+    n = len(tiles)
+    members = [sorted(index[tile] for tile in constraint_tiles) for constraint_tiles, need in group]
+    needs = [need for constraint_tiles, need in group]
+
+    # constraints that have some tiles before k and some from k on are open at k, states are their mines so far
+    of_tile = [[] for _ in range(n)]
+    for c, positions in enumerate(members):
+        for k in positions:
+            of_tile[k].append(c)
+    open_at = [[] for _ in range(n + 1)]
+    for c, positions in enumerate(members):
+        for k in range(positions[0] + 1, positions[-1] + 1):
+            open_at[k].append(c)
+    left_after = {}  # (c, k): tiles of c after k
+    for c, positions in enumerate(members):
+        for m, k in enumerate(positions):
+            left_after[c, k] = len(positions) - m - 1
+
+    # forward pass, the ways of reaching each state with each number of mines
+    forward = [{(): {0: 1}}]
+    steps = []
+    for k in range(n):
+        position = {c: m for m, c in enumerate(open_at[k])}
+        # each constraint of tile k as (its place in the state or -1 if it starts here, mines needed, tiles after k),
+        # and where each number of the next state is in the current state followed by the constraints of tile k
+        checks = [(position.get(c, -1), needs[c], left_after[c, k]) for c in of_tile[k]]
+        own = {c: len(open_at[k]) + m for m, c in enumerate(of_tile[k])}
+        take = [own[c] if c in own else position[c] for c in open_at[k + 1]]
+        reached = {}
+        step = []
+        for state, ways in forward[k].items():
+            for value in (0, 1):
+                placed = []
+                for m, need, left in checks:
+                    mines = (state[m] if m >= 0 else 0) + value
+                    if mines > need or mines + left < need:
+                        break
+                    placed.append(mines)
+                else:
+                    combined = state + tuple(placed)
+                    following = tuple([combined[m] for m in take])
+                    step.append((state, value, following))
+                    target = reached.setdefault(following, {})
+                    for mines, count in ways.items():
+                        target[mines + value] = target.get(mines + value, 0) + count
+        forward.append(reached)
+        steps.append(step)
+
+    # backward pass, the ways of finishing from each state
+    backward = [None] * n + [{(): {0: 1}}]
+    for k in range(n - 1, -1, -1):
+        finishing = {}
+        for state, value, following in steps[k]:
+            target = finishing.setdefault(state, {})
+            for mines, count in backward[k + 1].get(following, {}).items():
+                target[mines + value] = target.get(mines + value, 0) + count
+        backward[k] = finishing
+
+    # the settled mines are in every way, shift the counts by them
+    fixed = len(settled_mines)
+    ways = {mines + fixed: count for mines, count in forward[n].get((), {}).items()}
+    mine_ways = []
+    for k in range(n):
+        tile_ways = {}
+        for state, value, following in steps[k]:
+            if value and following in backward[k + 1]:
+                for mines, count in _multiply(forward[k][state], backward[k + 1][following]).items():
+                    tile_ways[mines + 1 + fixed] = tile_ways.get(mines + 1 + fixed, 0) + count
+        mine_ways.append(tile_ways)
+    return (tiles + sorted(settled_mines) + sorted(settled_safe), ways,
+            mine_ways + [ways] * fixed + [{}] * len(settled_safe))
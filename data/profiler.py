@@ -0,0 +1,94 @@
+import csv
+import json
+from array import array
+from time import perf_counter_ns
+
+PHASES = ('events', 'update', 'draw', 'board', 'frame')
+
+
+class Profiler:
+    """Times the phases of each frame of the game loop with perf_counter_ns. The last window frames are used for the
+    percentiles and histogram shown in the overlay. If keep_all is False older samples are thrown away, otherwise every
+    frame is kept so it can be written out with dump()"""
+
+    def __init__(self, window=300, keep_all=False):
+        self.window = window
+        self.keep_all = keep_all
+        self.samples = {phase: array('q') for phase in PHASES}  # ns
+        self.tiles = array('q')  # tiles drawn by the board each frame
+        self._phase_start = 0
+        self._frame_start = 0
+        self._skip = False
+        self._current = {}
+
+    def start(self):
+        """Called at the start of a frame"""
+        self._current = {'board': 0}
+        self._skip = False
+        self._frame_start = self._phase_start = perf_counter_ns()
+
+    def mark(self, phase):
+        """Ends the timing of phase, the next phase starts now"""
+        now = perf_counter_ns()
+        self._current[phase] = now - self._phase_start
+        self._phase_start = now
+
+    def add(self, phase, ns):
+        """Adds time to a phase that is timed outside of mark(), like the board drawing inside the draw phase"""
+        self._current[phase] = self._current.get(phase, 0) + ns
+
+    def skip(self):
+        """Leaves the current frame out of the samples, used for frames that wait for something like the menu"""
+        self._skip = True
+
+    def end_frame(self, tiles=0):
+        """Stores the times of the frame"""
+        if self._skip:
+            return
+        self._current['frame'] = perf_counter_ns() - self._frame_start
+        for phase, samples in self.samples.items():
+            samples.append(self._current.get(phase, 0))
+        self.tiles.append(tiles)
+        if not self.keep_all and len(self.tiles) > 2 * self.window:
+            for samples in self.samples.values():
+                del samples[:-self.window]
+            del self.tiles[:-self.window]
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def percentile(self, phase, p):
+        """p-th percentile of the last window samples of phase in ms"""
+        recent = sorted(self.samples[phase][-self.window:])
+        if not recent:
+            return 0
+        return recent[min(len(recent) - 1, int(p / 100 * len(recent)))] / 1e6
+
+    def histogram(self, phase='frame', bucket_ms=1, buckets=20):
+        """Counts of the last window samples of phase in buckets bucket_ms wide, the last bucket holds everything
+        slower"""
+        counts = [0] * buckets
+        bucket_ns = bucket_ms * 1000000
+        for ns in self.samples[phase][-self.window:]:
+            counts[min(buckets - 1, ns // bucket_ns)] += 1
+        return counts
+
+    def summary(self):
+        """p50, p99 and max in ms of every phase over the last window frames"""
+        return {phase: {'p50': self.percentile(phase, 50), 'p99': self.percentile(phase, 99),
+                        'max': max(self.samples[phase][-self.window:], default=0) / 1e6} for phase in PHASES}
+
+    def dump(self, path):
+        """Writes the samples in ms to path, as json if it ends in .json otherwise as csv with a row per frame"""
+        if path.endswith('.json'):
+            data = {phase: [ns / 1e6 for ns in samples] for phase, samples in self.samples.items()}
+            data['tiles'] = list(self.tiles)
+            data['summary'] = self.summary()
+            with open(path, 'w') as file:
+                json.dump(data, file)
+            return
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([phase + '_ms' for phase in PHASES] + ['tiles'])
+            for n in range(len(self.tiles)):
+                writer.writerow(['{:.4f}'.format(self.samples[phase][n] / 1e6) for phase in PHASES] + [self.tiles[n]])
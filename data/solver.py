@@ -0,0 +1,140 @@
+from random import Random
+
+from data.core import Board
+
+
+class Solver:
+    """Plays a board using the numbers that have been revealed. Tiles that are certainly safe or certainly mines are
+    found with the single tile rule (a number already touching all of its mines or needing all of its unrevealed tiles)
+    and the subset rule (comparing two numbers whose unrevealed tiles overlap). Only when neither finds a move does it
+    guess. Works with data.core.Board or data.mineboard.Board"""
+
+    def __init__(self, board, seed=None):
+        """seed is used for guesses so games played from the same board and seed are the same. The guesses come from
+        a stream of their own, boards place their mines with Random(seed) so a solver seeded with the same number as
+        its board would otherwise guess the first mine every time"""
+        self.board = board
+        self.random = Random(None if seed is None else 'solver {}'.format(seed))
+        self.guesses = 0
+
+        self.frontier = set()  # revealed numbers that still have unrevealed neighbours
+        self._todo = set()  # frontier tiles that have changed since they were last checked
+        self._around = {}  # neighbour lists are made once per tile
+
+        self.update([(i, j) for i in range(board.height) for j in range(board.width) if board.top[i][j] == 1])
+
+    def neighbours(self, i, j):
+        """Returns the indices of the tiles around (i, j) that are inside the board"""
+        around = self._around.get((i, j))
+        if around is None:
+            height, width = self.board.height, self.board.width
+            around = [(i + di, j + dj) for di, dj in Board.neighbours if 0 <= i + di < height and 0 <= j + dj < width]
+            self._around[(i, j)] = around
+        return around
+
+    def update(self, changed):
+        """Updates the frontier from the tiles changed by a reveal or flag, only tiles next to a change need checking
+        again"""
+        top, bottom = self.board.top, self.board.bottom
+        for i, j in changed:
+            if top[i][j] == 1 and bottom[i][j] > 0:
+                self.frontier.add((i, j))
+                self._todo.add((i, j))
+            for tile in self.neighbours(i, j):
+                if tile in self.frontier:
+                    self._todo.add(tile)
+
+    def constraint(self, i, j):
+        """Returns the unrevealed tiles around the number at (i, j) and how many of them are mines"""
+        top = self.board.top
+        unknown = []
+        flags = 0
+        for a, b in self.neighbours(i, j):
+            if not top[a][b]:
+                unknown.append((a, b))
+            elif top[a][b] == 2:
+                flags += 1
+        return unknown, self.board.bottom[i][j] - flags
+
+    def next_moves(self):
+        """Returns a set of tiles to reveal and a set of tiles to flag. If no tile is certain a single guess is returned
+        to be revealed"""
+        safe, mines = set(), set()
+
+        # single tile rule on the tiles that changed
+        for tile in self._todo:
+            if tile not in self.frontier:
+                continue
+            unknown, remaining = self.constraint(*tile)
+            if not unknown:
+                self.frontier.discard(tile)
+            elif remaining == 0:
+                safe.update(unknown)
+            elif remaining == len(unknown):
+                mines.update(unknown)
+        self._todo.clear()
+        if safe or mines:
+            return safe, mines
+
+        # subset rule on the whole frontier
+        constraints = {}
+        touching = {}  # unrevealed tile: frontier tiles around it
+        for tile in list(self.frontier):
+            unknown, remaining = self.constraint(*tile)
+            if not unknown:
+                self.frontier.discard(tile)
+                continue
+            constraints[tile] = frozenset(unknown), remaining
+            for other in unknown:
+                touching.setdefault(other, []).append(tile)
+        for tile, (unknown, remaining) in constraints.items():
+            for other in {other for n in unknown for other in touching[n]}:
+                other_unknown, other_remaining = constraints[other]
+                if unknown < other_unknown:
+                    extra = other_unknown - unknown
+                    if other_remaining == remaining:
+                        safe |= extra
+                    elif other_remaining - remaining == len(extra):
+                        mines |= extra
+        if safe or mines:
+            return safe, mines
+
+        # every mine has been found so the rest is safe
+        if self.board.n_mines == self.board.n_flags:
+            return self._unknown_tiles(), mines
+
+        self.guesses += 1
+        return {self._guess(constraints)}, mines
+
+    def _unknown_tiles(self):
+        """Every tile that has not been revealed or flagged"""
+        top = self.board.top
+        return {(i, j) for i in range(self.board.height) for j in range(self.board.width) if not top[i][j]}
+
+    def _guess(self, constraints):
+        """Picks the unrevealed tile least likely to be a mine. Tiles next to numbers are given the highest chance of
+        the numbers around them and every other tile is given the chance from the number of mines left"""
+        chance = {}
+        for unknown, remaining in constraints.values():
+            for tile in unknown:
+                chance[tile] = max(chance.get(tile, 0), remaining / len(unknown))
+
+        board = self.board
+        n_unknown = board.width * board.height - board.n_revealed - board.n_flags
+        best = min(chance, key=chance.get) if chance else None
+        if n_unknown > len(chance) and (best is None or chance[best] > (board.n_mines - board.n_flags) / n_unknown):
+            best = self.random.choice(sorted(self._unknown_tiles() - chance.keys()))
+        return best
+
+    def step(self):
+        """Flags and reveals the next moves. Returns the tiles that changed"""
+        safe, mines = self.next_moves()
+        changed = self.board.flag_many(mines) + self.board.reveal_many(safe)
+        self.update(changed)
+        return changed
+
+    def play(self):
+        """Plays until the board is solved or a mine is hit. Returns True if the board was solved"""
+        while not self.board.exploded and not self.board.solved:
+            self.step()
+        return self.board.solved
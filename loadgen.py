@@ -0,0 +1,135 @@
+"""Load generator for server.py. Opens many sessions spread over a number of connections, plays random moves on all of
+them for a while and prints the move rate and latency.
+
+    python server.py &
+    python loadgen.py --sessions 10000 --connections 100 --duration 30
+
+Each connection sends one request for each of its sessions, then reads the replies, so every session always has one
+request in flight. Latency is the time from sending a request to reading its reply.
+"""
+import argparse
+import asyncio
+import json
+from random import Random
+from time import perf_counter
+
+from server import COVERED_VALUE, FLAG_VALUE
+
+
+class Player:
+    """The client side of a session, tracks the covered tiles so it only reveals tiles that can change"""
+    __slots__ = ('session', 'covered', 'state')
+
+    def __init__(self):
+        self.session = None
+        self.covered = []
+        self.state = 'new'
+
+    def start(self, reply):
+        self.session = reply['session']
+        self.covered = [(i, j) for i in range(reply['height']) for j in range(reply['width'])]
+        self.state = 'playing'
+
+    def update(self, reply):
+        changed = reply['changed']
+        uncovered = {(changed[k], changed[k + 1]) for k in range(0, len(changed), 3)
+                     if changed[k + 2] not in (FLAG_VALUE, COVERED_VALUE)}
+        if uncovered:
+            self.covered = [tile for tile in self.covered if tile not in uncovered]
+        self.state = reply['state']
+
+
+async def run_connection(open_connection, players, size, rng, stop_at, latencies, counts):
+    """Plays every player of one connection until stop_at"""
+    reader, writer = await open_connection()
+    width, height, mines = size
+    try:
+        while perf_counter() < stop_at:
+            lines = []
+            for player in players:
+                if player.state == 'playing':
+                    i, j = rng.choice(player.covered)
+                    op = 'flag' if rng.random() < 0.1 else 'reveal'
+                    request = {'op': op, 'session': player.session, 'i': i, 'j': j}
+                else:
+                    if player.session is not None:
+                        lines.append(json.dumps({'op': 'close', 'session': player.session}))
+                    request = {'op': 'new', 'width': width, 'height': height, 'mines': mines,
+                               'seed': rng.getrandbits(32)}
+                lines.append(json.dumps(request))
+            writer.write(('\n'.join(lines) + '\n').encode())
+            sent = perf_counter()
+            await writer.drain()
+
+            for player in players:
+                if player.state != 'playing' and player.session is not None:
+                    await reader.readline()  # reply to the close
+                reply = json.loads(await reader.readline())
+                latencies.append(perf_counter() - sent)
+                if 'error' in reply:
+                    raise RuntimeError(reply['error'])
+                if 'changed' in reply:
+                    player.update(reply)
+                    counts['moves'] += 1
+                else:
+                    player.start(reply)
+                    counts['games'] += 1
+    finally:
+        writer.close()
+
+
+async def load_test(sessions, connections, duration, size, host, port, unix, seed):
+    if unix:
+        def open_connection():
+            return asyncio.open_unix_connection(unix)
+    else:
+        def open_connection():
+            return asyncio.open_connection(host, port)
+
+    rng = Random(seed)
+    players = [Player() for _ in range(sessions)]
+    latencies = []
+    counts = {'moves': 0, 'games': 0}
+    start = perf_counter()
+    stop_at = start + duration
+    await asyncio.gather(*[run_connection(open_connection, players[n::connections], size, Random(rng.random()),
+                                          stop_at, latencies, counts) for n in range(connections)])
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {'sessions': sessions, 'connections': connections, 'seconds': elapsed,
+            'moves': counts['moves'], 'games': counts['games'],
+            'moves_per_second': counts['moves'] / elapsed,
+            'latency_ms': {'p50': latencies[len(latencies) // 2] * 1000,
+                           'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures moves per second and latency of server.py')
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run for')
+    parser.add_argument('--width', type=int, default=30)
+    parser.add_argument('--height', type=int, default=16)
+    parser.add_argument('--mines', type=int, default=99)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='connect to this unix socket instead of tcp')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args()
+    if not 1 <= args.connections <= args.sessions:
+        parser.error('--connections must be between 1 and --sessions')
+
+    result = asyncio.run(load_test(args.sessions, args.connections, args.duration,
+                                   (args.width, args.height, args.mines), args.host, args.port, args.unix, args.seed))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print('{sessions} sessions on {connections} connections: {moves} moves and {games} games in {seconds:.1f}s, '
+              '{moves_per_second:.0f} moves/s, latency p50 {p50:.2f}ms p99 {p99:.2f}ms'.format(
+                **result, **result['latency_ms']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Replays games from a move log (see data/movelog.py).
+
+    python replay.py games.mlog                 replays every game as fast as possible and prints statistics
+    python replay.py games.mlog --watch 3       shows game 3 in a window at the speed it was played
+
+Set MOVE_LOG in settings.py to record games to a log.
+"""
+import argparse
+import json
+from time import perf_counter
+
+from data.movelog import LogReader, replay_file
+
+
+def analyse(path):
+    """Replays every game in the log without rendering and returns a dict of statistics"""
+    games = wins = losses = moves = 0
+    play_time = 0
+    start = perf_counter()
+    for game, board in replay_file(path):
+        games += 1
+        moves += len(game)
+        wins += board.solved
+        losses += board.exploded
+        play_time += sum(dt for dt, op, i, j in game.moves())
+    elapsed = perf_counter() - start
+    return {'games': games, 'wins': wins, 'losses': losses, 'unfinished': games - wins - losses, 'moves': moves,
+            'play_time_s': play_time / 1000, 'replay_time_s': elapsed,
+            'moves_per_second': moves / elapsed if elapsed else 0}
+
+
+def watch(path, index):
+    """Opens the game window and plays game index of the log at the speed it was recorded"""
+    import pygame as pg
+    pg.init()
+    from data.game import Game
+
+    with LogReader(path) as reader:
+        for n, game in enumerate(reader):
+            if n == index:
+                break
+        else:
+            raise SystemExit('{} has no game {}'.format(path, index))
+        window = Game(run=False, log_path=None)
+        window.start_replay(game)
+        window.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays games recorded to a move log')
+    parser.add_argument('path', help='move log to read')
+    parser.add_argument('--watch', type=int, metavar='GAME', help='show this game (counting from 0) in a window')
+    parser.add_argument('--json', action='store_true', help='print statistics as json')
+    args = parser.parse_args()
+
+    if args.watch is not None:
+        watch(args.path, args.watch)
+        return
+    result = analyse(args.path)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print('{games} games ({wins} won, {losses} lost, {unfinished} unfinished), {moves} moves, '
+              '{play_time_s:.0f}s of play replayed in {replay_time_s:.3f}s ({moves_per_second:.0f} moves/s)'
+              .format(**result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Hosts many minesweeper games at once over TCP or a Unix socket.
+
+    python server.py --port 8765
+    python server.py --unix /tmp/minesweeper.sock
+
+Clients send one json request per line and get one json reply per line, in the same order:
+
+    {"op": "new", "width": 30, "height": 16, "mines": 99, "seed": 1, "safe_first_click": true}
+        -> {"session": 1, "width": 30, "height": 16, "mines": 99}
+    {"op": "reveal", "session": 1, "i": 3, "j": 4}  or  {"op": "flag", ...}
+        -> {"session": 1, "changed": [i, j, value, i, j, value, ...], "state": "playing", "won" or "lost"}
+    {"op": "close", "session": 1}
+        -> {"session": 1, "closed": true}
+
+Only the tiles that changed are sent back. A value is what the player now sees on the tile: 0-8 for a number, -1 a
+mine, -2 the mine that was hit, -3 a wrong flag, 9 a flag and 10 a covered tile. Bad requests get {"error": "..."}.
+
+Games are data.bitboard.BitBoard so a session is a few ints rather than lists of tiles. Sessions belong to the
+connection that made them and are closed with it, or after idle_timeout seconds without a move. Boards can have at
+most max_cells tiles, a few times an expert board by default, so every move is answered in a few milliseconds and
+the moves run on the event loop rather than in an executor. Each reply is drained before the next request is read so
+a client that stops reading stops being served rather than filling memory.
+"""
+import argparse
+import asyncio
+import json
+from time import monotonic
+
+from data.bitboard import BitBoard
+
+FLAG_VALUE = 9
+COVERED_VALUE = 10
+
+
+class Session:
+    __slots__ = ('board', 'last_used', 'connection')
+
+    def __init__(self, board, connection):
+        self.board = board
+        self.last_used = monotonic()
+        self.connection = connection
+
+
+class GameServer:
+    def __init__(self, idle_timeout=300, max_sessions=100000, max_cells=1024):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_cells = max_cells
+        self.sessions = {}  # id: Session
+        self.next_id = 1
+        self.connections = {}  # writer: ids of the sessions it made
+        self.read_size = 1 << 16
+
+    async def handle(self, reader, writer):
+        """Serves one connection until it closes. Every complete request that has arrived is answered with a single
+        write, so a client that sends requests without waiting costs one send per batch instead of one per reply"""
+        owned = self.connections.setdefault(writer, set())
+        pending = b''
+        try:
+            while True:
+                data = await reader.read(self.read_size)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b'\n')
+                if len(pending) > self.read_size:
+                    break  # a request that long is not a real request
+                if lines:
+                    writer.write(b''.join([self.request(line, writer) for line in lines]))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            del self.connections[writer]
+            writer.close()
+
+    def request(self, line, writer):
+        """Runs one request and returns the reply as a line of json"""
+        try:
+            message = json.loads(line)
+            op = message['op']
+            if op == 'new':
+                reply = self.new_session(message, writer)
+            else:
+                session_id = message['session']
+                session = self.sessions.get(session_id)
+                if session is None or session.connection is not writer:
+                    raise ValueError('no session {}'.format(session_id))
+                session.last_used = monotonic()
+                if op == 'reveal':
+                    reply = self.move(session_id, session.board, session.board.reveal_tile(message['i'], message['j']))
+                elif op == 'flag':
+                    reply = self.move(session_id, session.board, session.board.place_flag(message['i'], message['j']))
+                elif op == 'close':
+                    self.close_session(session_id)
+                    reply = {'session': session_id, 'closed': True}
+                else:
+                    raise ValueError('unknown op {}'.format(op))
+        except KeyError as error:
+            reply = {'error': 'missing {}'.format(error)}
+        except (ValueError, TypeError, OverflowError) as error:
+            reply = {'error': str(error)}
+        except RecursionError:
+            reply = {'error': 'request is nested too deeply'}
+        return json.dumps(reply, separators=(',', ':')).encode() + b'\n'
+
+    def new_session(self, message, writer):
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError('the server is full')
+        width, height, mines = int(message['width']), int(message['height']), int(message['mines'])
+        if width < 1 or height < 1:
+            raise ValueError('boards need at least one row and one column')
+        if width * height > self.max_cells:
+            raise ValueError('boards can have at most {} tiles'.format(self.max_cells))
+        seed = message.get('seed')
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+            raise ValueError('seed must be an integer or null')
+        board = BitBoard()
+        board.create_new(width, height, mines, seed, message.get('safe_first_click', True))
+        session_id = self.next_id
+        self.next_id += 1
+        self.sessions[session_id] = Session(board, writer)
+        self.connections[writer].add(session_id)
+        return {'session': session_id, 'width': width, 'height': height, 'mines': mines}
+
+    @staticmethod
+    def move(session_id, board, changed):
+        """Reply to a reveal or flag with the values the player now sees on the changed tiles"""
+        values = []
+        for (i, j), (top, bottom) in zip(changed, board.tiles(changed)):
+            values += i, j, bottom if top == 1 else FLAG_VALUE if top == 2 else COVERED_VALUE
+        state = 'lost' if board.exploded else 'won' if board.solved else 'playing'
+        return {'session': session_id, 'changed': values, 'state': state}
+
+    def close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.connections[session.connection].discard(session_id)
+
+    async def close_idle(self):
+        """Closes sessions that have not had a move for idle_timeout seconds, checking a few times per timeout"""
+        while True:
+            await asyncio.sleep(self.idle_timeout / 4)
+            oldest = monotonic() - self.idle_timeout
+            for session_id in [key for key, session in self.sessions.items() if session.last_used < oldest]:
+                self.close_session(session_id)
+
+    async def serve(self, host='127.0.0.1', port=8765, unix=None, backlog=4096):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix, backlog=backlog)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, backlog=backlog)
+        reaper = asyncio.ensure_future(self.close_idle())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hosts minesweeper games over a line based json protocol')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this unix socket instead of tcp')
+    parser.add_argument('--idle-timeout', type=float, default=300, help='seconds before an unused session is closed')
+    parser.add_argument('--max-sessions', type=int, default=100000)
+    parser.add_argument('--max-cells', type=int, default=1024, help='most tiles a board can have')
+    args = parser.parse_args()
+    server = GameServer(args.idle_timeout, args.max_sessions, args.max_cells)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
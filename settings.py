@@ -10,9 +10,19 @@ TILESIZE = 32  # this is not meant to be changed as it is dependent on the image
 W = TILESIZE * WIDTH
 H = TILESIZE * HEIGHT + TILESIZE
 FPS = 60
+EVENT_DRIVEN = True  # sleep until there is input instead of redrawing at FPS
+MOVE_LOG = None  # path of a file every game is recorded to, see data/movelog.py
+NO_GUESS = False  # only give boards that can be solved without guessing, they are made in the background
+PROFILE_DUMP = None  # path of a .csv or .json file the frame times are written to on exit, see data/profiler.py
 LEFT = 1
 RIGHT = 3
 
+# camera
+MAX_W = 1280  # boards bigger than this are scrolled
+MAX_H = 768
+PAN_SPEED = 12  # pixels per frame when scrolling with the keyboard
+ZOOM_STEP = 1.25
+
 #Colour    R    G    B
 colours = {1: 'blue', 2: 'darkgreen', 3: 'red', 4: 'purple', 5: ' maroon', 6: 'turquoise', 7: 'black', 8: 'gray'}
 
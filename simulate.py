@@ -0,0 +1,128 @@
+"""Plays many games with the solver across all cores and prints win rate, guesses and timing statistics.
+
+    python simulate.py -n 100000 -d expert --seed 1
+    python simulate.py -n 10000 --width 30 --height 16 --mines 120
+"""
+import argparse
+import json
+import os
+from array import array
+from multiprocessing import Pool
+from random import Random
+from time import perf_counter, perf_counter_ns
+
+from data.core import Board
+from data.solver import Solver
+
+
+def game_seeds(master_seed, game):
+    """Board and solver seeds of a single game. Each game gets its own so results do not depend on how games are split
+    over workers, and the two are drawn separately so the solver's guesses have nothing to do with where the mines are"""
+    rng = Random('game {} {}'.format(master_seed, game))
+    return rng.getrandbits(63), rng.getrandbits(63)
+
+
+def play_chunk(job):
+    """Plays games first to last - 1 of a setting. Returns the number of wins, total guesses and the time of each game
+    in nanoseconds"""
+    width, height, mines, master_seed, safe_first_click, first, last = job
+    board = Board()
+    wins = 0
+    guesses = 0
+    times = array('q')
+    for game in range(first, last):
+        board_seed, solver_seed = game_seeds(master_seed, game)
+        start = perf_counter_ns()
+        board.create_new(width, height, mines, board_seed, safe_first_click)
+        solver = Solver(board, solver_seed)
+        wins += solver.play()
+        times.append(perf_counter_ns() - start)
+        guesses += solver.guesses
+    return wins, guesses, times
+
+
+def percentile(ordered, p):
+    """p-th percentile of an already sorted sequence"""
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def simulate(width, height, mines, games, master_seed=0, workers=None, chunk_size=None, pool=None,
+             safe_first_click=False):
+    """Plays games on a pool of worker processes and returns a dict of the results. The games are split into chunks
+    that workers take as they finish, results are added up as each chunk comes back"""
+    workers = workers or os.cpu_count()
+    chunk_size = chunk_size or max(1, min(1000, games // (workers * 8)))
+    jobs = [(width, height, mines, master_seed, safe_first_click, first, min(first + chunk_size, games))
+            for first in range(0, games, chunk_size)]
+
+    wins = 0
+    guesses = 0
+    times = array('q')
+    start = perf_counter()
+    own_pool = pool is None
+    if own_pool:
+        pool = Pool(workers)
+    try:
+        for chunk_wins, chunk_guesses, chunk_times in pool.imap_unordered(play_chunk, jobs):
+            wins += chunk_wins
+            guesses += chunk_guesses
+            times.extend(chunk_times)
+    finally:
+        if own_pool:
+            pool.close()
+            pool.join()
+    elapsed = perf_counter() - start
+
+    ordered = sorted(times)
+    return {'width': width, 'height': height, 'mines': mines, 'games': games, 'seed': master_seed,
+            'safe_first_click': safe_first_click,
+            'win_rate': wins / games if games else 0,
+            'guesses_per_game': guesses / games if games else 0,
+            'time_ms': {'p50': percentile(ordered, 50) / 1e6, 'p90': percentile(ordered, 90) / 1e6,
+                        'p99': percentile(ordered, 99) / 1e6} if ordered else {},
+            'games_per_second': games / elapsed if elapsed else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays games with the solver and prints statistics')
+    parser.add_argument('-n', '--games', type=int, default=10000, help='games for each setting')
+    parser.add_argument('-d', '--difficulty', default='all', choices=['all'] + list(Board.difficulties),
+                        help='preset to play, ignored if --width, --height and --mines are given')
+    parser.add_argument('--width', type=int)
+    parser.add_argument('--height', type=int)
+    parser.add_argument('--mines', type=int)
+    parser.add_argument('--seed', type=int, default=0, help='master seed, the same seed gives the same games')
+    parser.add_argument('--safe-first-click', action='store_true',
+                        help='place mines after the first reveal, away from the revealed tile')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, help='games sent to a worker at a time')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error('--games must be at least 1')
+
+    if args.width and args.height and args.mines is not None:
+        settings = [(args.width, args.height, args.mines)]
+    else:
+        names = list(Board.difficulties) if args.difficulty == 'all' else [args.difficulty]
+        settings = [(Board.difficulties[name][1], Board.difficulties[name][2], Board.difficulties[name][0])
+                    for name in names]
+
+    results = []
+    with Pool(args.workers) as pool:
+        for width, height, mines in settings:
+            result = simulate(width, height, mines, args.games, args.seed, args.workers, args.chunk_size, pool,
+                              args.safe_first_click)
+            results.append(result)
+            if not args.json:
+                print('{}x{} {} mines: {} games, win rate {:.2%}, {:.2f} guesses/game, game time p50 {:.3f}ms '
+                      'p90 {:.3f}ms p99 {:.3f}ms, {:.0f} games/s'.format(
+                        width, height, mines, result['games'], result['win_rate'], result['guesses_per_game'],
+                        result['time_ms']['p50'], result['time_ms']['p90'], result['time_ms']['p99'],
+                        result['games_per_second']))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
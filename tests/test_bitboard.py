@@ -0,0 +1,51 @@
+import unittest
+from random import Random
+
+from data.bitboard import BitBoard
+from data.core import Board
+
+
+class BitBoardTest(unittest.TestCase):
+    def test_matches_core_board(self):
+        """The same seed and moves give the same tiles, counters and changed tiles as data.core.Board"""
+        rng = Random(4)
+        for _ in range(150):
+            width, height = rng.randint(1, 25), rng.randint(1, 25)
+            settings = width, height, rng.randint(0, width * height), rng.getrandbits(32), rng.random() < 0.5
+            board, bits = Board(debug=True), BitBoard()
+            board.create_new(*settings)
+            bits.create_new(*settings)
+            for _ in range(40):
+                if board.exploded or board.solved:
+                    break
+                i, j = rng.randrange(height), rng.randrange(width)
+                if rng.random() < 0.2:
+                    expected, changed = board.place_flag(i, j), bits.place_flag(i, j)
+                else:
+                    expected, changed = board.reveal_tile(i, j), bits.reveal_tile(i, j)
+                self.assertEqual(sorted(changed), sorted(expected))
+            if rng.random() < 0.3:
+                self.assertEqual(sorted(bits.reveal_board()), sorted(board.reveal_board()))
+            self.assertEqual(bits.top, board.top)
+            self.assertEqual(bits.bottom, board.bottom)
+            self.assertEqual((bits.n_flags, bits.n_revealed, bits.exploded, bits.solved),
+                             (board.n_flags, board.n_revealed, board.exploded, board.solved))
+
+    def test_tiles_match_top_and_bottom(self):
+        bits = BitBoard('expert')
+        bits.reveal_tile(8, 15)
+        bits.place_flag(0, 0)
+        cells = [(i, j) for i in range(bits.height) for j in range(bits.width)]
+        top, bottom = bits.top, bits.bottom
+        self.assertEqual(bits.tiles(cells), [(top[i][j], bottom[i][j]) for i, j in cells])
+
+    def test_reveal_board_before_first_click(self):
+        bits = BitBoard()
+        bits.create_new(8, 1, 2, seed=5, safe_first_click=True)
+        bits.place_flag(0, 0)
+        bits.reveal_board()
+        self.assertEqual(sum(row.count(-1) for row in bits.bottom), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from random import Random
+
+from data.core import Board
+
+
+def play_randomly(board, rng, moves=60):
+    """Makes random reveals and flags, some of them in batches, until the game ends or moves run out"""
+    for _ in range(moves):
+        if board.exploded or board.solved:
+            break
+        tiles = [(rng.randrange(board.height), rng.randrange(board.width)) for _ in range(rng.choice((1, 1, 1, 4)))]
+        if rng.random() < 0.2:
+            board.flag_many(tiles) if len(tiles) > 1 else board.place_flag(*tiles[0])
+        else:
+            board.reveal_many(tiles) if len(tiles) > 1 else board.reveal_tile(*tiles[0])
+
+
+class CounterTest(unittest.TestCase):
+    """Boards made with debug=True rescan the whole board after every move and raise an AssertionError if the counters
+    kept by the board do not match"""
+
+    def play_games(self, use_array):
+        rng = Random(1)
+        board = Board(use_array=use_array, debug=True)
+        for _ in range(150):
+            width, height = rng.randint(1, 25), rng.randint(1, 25)
+            board.create_new(width, height, rng.randint(0, width * height), rng.getrandbits(32), rng.random() < 0.5)
+            play_randomly(board, rng)
+            if rng.random() < 0.3:
+                board.reveal_board()
+            board.check_counters()
+
+    def test_list_counters(self):
+        self.play_games(use_array=False)
+
+    def test_array_counters(self):
+        self.play_games(use_array=True)
+
+    def test_reveal_board_before_first_click(self):
+        """The mines are placed before the board is revealed, not by a later click under revealed tiles"""
+        for use_array in (False, True):
+            for seed in range(20):
+                board = Board(use_array=use_array, debug=True)
+                board.create_new(8, 1, 2, seed=seed, safe_first_click=True)
+                board.place_flag(0, 0)
+                board.reveal_board()
+                self.assertEqual(sum(list(row).count(-1) for row in board.bottom), 2)
+                board.reveal_tile(0, 7)
+
+
+class BoardTest(unittest.TestCase):
+    def test_same_seed_same_mines(self):
+        a, b = Board(), Board()
+        a.create_new(30, 16, 99, seed=7)
+        b.create_new(30, 16, 99, seed=7)
+        self.assertEqual(a.bottom, b.bottom)
+
+    def test_safe_first_click(self):
+        rng = Random(2)
+        board = Board(debug=True)
+        for _ in range(100):
+            board.create_new(9, 9, 10, rng.getrandbits(32), safe_first_click=True)
+            i, j = rng.randrange(9), rng.randrange(9)
+            board.reveal_tile(i, j)
+            self.assertFalse(board.exploded)
+            self.assertEqual(board.bottom[i][j], 0)  # its neighbours are kept clear too
+
+    def test_array_mine_hit(self):
+        """Hitting a mine on an array board reveals the board without listing every tile"""
+        import numpy as np
+        board = Board(use_array=True, debug=True)
+        board.create_new(30, 16, 99, seed=5)
+        i, j = [int(k) for k in np.argwhere(board.bottom == -1)[0]]
+        self.assertEqual(board.reveal_tile(i, j), [(i, j)])
+        self.assertTrue(board.exploded)
+        self.assertTrue((board.top == 1).all())
+
+    def test_array_regions_match_list(self):
+        import numpy as np
+        rng = Random(3)
+        for _ in range(200):
+            width, height = rng.randint(1, 40), rng.randint(1, 40)
+            listed = Board()
+            listed.create_new(width, height, rng.randint(0, width * height), rng.getrandbits(32))
+            array = Board(use_array=True)
+            array.create_new(width, height, 0)
+            array.bottom = np.array(listed.bottom, dtype=np.int8)
+            array.label_regions()
+            self.assertEqual(array._region_of.tolist(), listed._region_of)
+            starts = array._region_starts
+            self.assertEqual([array._regions[starts[r]:starts[r + 1]].tolist() for r in range(len(starts) - 1)],
+                             [sorted(cells) for cells in listed._regions])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from data.core import Board
+from data.infinite import InfiniteBoard
+
+
+def find_tile(board, empty, start=0):
+    """The first covered tile along the diagonal from (start, start) that is empty or a number"""
+    k = start
+    while board.top(k, k) or (board.bottom(k, k) == 0) != empty or board.bottom(k, k) == -1:
+        k += 1
+    return k, k
+
+
+class InfiniteBoardTest(unittest.TestCase):
+    def test_numbers_across_chunks(self):
+        board = InfiniteBoard(density=0.2, chunk_size=8, seed=3, max_chunks=4)
+        size = board.chunk_size
+
+        def is_mine(i, j):
+            return (i % size) * size + j % size in board.chunk_mines(i // size, j // size)
+
+        for i in range(-12, 12):
+            for j in range(-12, 12):
+                if is_mine(i, j):
+                    self.assertEqual(board.bottom(i, j), -1)
+                else:
+                    self.assertEqual(board.bottom(i, j), sum(is_mine(i + di, j + dj) for di, dj in Board.neighbours))
+
+    def check_evicted_chunks(self, store_path):
+        board = InfiniteBoard(chunk_size=8, seed=5, max_chunks=2, store_path=store_path)
+        tile = find_tile(board, empty=False)
+        board.reveal_tile(*tile)
+        board.place_flag(0, 1)
+        for cj in range(1, 4):
+            board.top(0, cj * 100)  # untouched chunks push chunk (0, 0) out
+        self.assertNotIn((0, 0), board.chunks)
+        self.assertEqual(len(board.store.db), 1)  # untouched chunks are not saved
+        if store_path:
+            board.close()
+            board = InfiniteBoard(chunk_size=8, seed=5, max_chunks=2, store_path=store_path)
+        self.assertEqual(board.top(*tile), 1)
+        self.assertEqual(board.top(0, 1), 2)
+        self.assertEqual(board.top(1, 2), 0)
+        board.close()
+
+    def test_evicted_chunks_are_kept(self):
+        self.check_evicted_chunks(None)
+        with tempfile.TemporaryDirectory() as folder:
+            self.check_evicted_chunks(os.path.join(folder, 'chunks'))
+
+    def test_flood_limit(self):
+        board = InfiniteBoard(density=0.02, max_flood=500)
+        start = find_tile(board, empty=True)
+        changed = board.reveal_tile(*start)
+        self.assertLessEqual(len(changed), 500 + 8)
+        self.assertTrue(board.flooding)
+        self.assertLess(max(max(abs(i - start[0]), abs(j - start[1])) for i, j in changed), 40)  # spreads evenly
+
+        number = find_tile(board, empty=False, start=5000)
+        self.assertEqual(board.reveal_tile(*number), [number])  # a far away click does not carry the flood on
+        self.assertEqual(board.reveal_tile(*number), [])
+        opened = board.continue_flood()
+        self.assertTrue(opened)
+        self.assertFalse(set(opened) & set(changed))
+        opened += board.reveal_tile(*start)  # so does a click inside the flood
+        self.assertEqual(len(set(opened)), len(opened))
+        self.assertEqual(board.n_revealed, len(changed) + 1 + len(opened))
+        self.assertLessEqual(len(board._pending), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from random import Random
+
+from data.core import Board
+from data.movelog import FLAG, REVEAL, LogReader, LogWriter, replay_file
+
+
+class MoveLogTest(unittest.TestCase):
+    def test_replays_match_games(self):
+        """Games written to a log and replayed from it end on the same board"""
+        rng = Random(8)
+        path = os.path.join(tempfile.mkdtemp(), 'games.log')
+        writer = LogWriter(path)
+        played = []
+        for n in range(30):
+            board = Board(use_array=n % 3 == 0)
+            width, height = rng.randint(2, 20), rng.randint(2, 20)
+            mines = rng.randint(1, width * height // 3)
+            board.create_new(width, height, mines, rng.getrandbits(63), rng.random() < 0.5)
+            writer.start_board(board)
+            while not board.exploded and not board.solved and rng.random() < 0.97:
+                i, j = rng.randrange(height), rng.randrange(width)
+                op = FLAG if rng.random() < 0.2 else REVEAL
+                if (board.place_flag if op == FLAG else board.reveal_tile)(i, j):
+                    writer.add(op, i, j, rng.randrange(1000))
+            if writer.n_moves:
+                played.append([list(row) for row in board.top])
+        writer.close()
+
+        replayed = [[list(row) for row in board.top] for game, board in replay_file(path)]
+        self.assertEqual(replayed, played)
+        with LogReader(path) as reader:
+            self.assertEqual(sum(1 for game in reader), len(played))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from data.core import Board
+from data.pool import RECORD, BoardPool, no_guess
+
+
+class BoardPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def pool(self, width=9, height=9, mines=10, target=0, wait=0.5):
+        pool = BoardPool(width, height, mines, self.folder.name, target=target, wait=wait)
+        self.addCleanup(pool.stop)
+        return pool
+
+    def test_take_add_truncate(self):
+        pool = self.pool()
+        for record in [(1, 0, 0), (2, 3, 4), (3, 8, 8)]:
+            pool.add(record)
+        self.assertEqual(os.path.getsize(pool.path), 3 * RECORD.size)
+        self.assertEqual(pool.take(), (3, 8, 8))
+        self.assertEqual(os.path.getsize(pool.path), 2 * RECORD.size)
+
+        with open(pool.path, 'ab') as file:
+            file.write(b'\0' * (RECORD.size - 1))  # a board cut off part way through writing
+        pool = self.pool()
+        self.assertEqual(pool.boards, [(1, 0, 0), (2, 3, 4)])
+        self.assertEqual(os.path.getsize(pool.path), 2 * RECORD.size)
+
+    def test_take_waits_for_thread(self):
+        pool = self.pool(target=1, wait=10)
+        record = pool.take()
+        self.assertIsNotNone(record)
+        board = Board()
+        board.create_new(9, 9, 10, record[0], safe_first_click=True)
+        self.assertTrue(no_guess(board, record[1:]))
+
+    def test_impossible_falls_back(self):
+        pool = self.pool(4, 4, 14, target=1, wait=10)
+        board = Board()
+        board.create_new(4, 4, 14)
+        board.pool = pool
+        board.reset(seed=1)
+        self.assertTrue(pool.impossible)
+        self.assertIsNone(board.start)  # the game shows the player the board may need guessing
+        self.assertEqual(board.n_mines, 14)
+        self.assertIsNone(pool.take())
+
+
+if __name__ == '__main__':
+    unittest.main()
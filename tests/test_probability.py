@@ -0,0 +1,82 @@
+import unittest
+from itertools import combinations
+from random import Random
+
+from data.core import Board
+from data.probability import ProbabilityEngine
+from data.solver import Solver
+
+
+def brute_force(board):
+    """The chance of a mine on every covered tile, found by trying every placement of the mines that are not flagged"""
+    top, bottom = board.top, board.bottom
+    covered = [(i, j) for i in range(board.height) for j in range(board.width) if top[i][j] == 0]
+    flags = {(i, j) for i in range(board.height) for j in range(board.width) if top[i][j] == 2}
+    numbers = [(i, j, bottom[i][j]) for i in range(board.height) for j in range(board.width)
+               if top[i][j] == 1 and bottom[i][j] >= 0]
+    counts = dict.fromkeys(covered, 0)
+    total = 0
+    for placed in combinations(covered, board.n_mines - len(flags)):
+        mines = flags.union(placed)
+        if all(sum((i + di, j + dj) in mines for di, dj in Board.neighbours) == number for i, j, number in numbers):
+            total += 1
+            for tile in placed:
+                counts[tile] += 1
+    return {tile: count / total for tile, count in counts.items()} if total else {}
+
+
+class ProbabilityTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = Random(6)
+        engine = ProbabilityEngine()
+        checked = 0
+        while checked < 150:
+            board = Board()
+            board.create_new(5, 4, rng.randint(3, 7), rng.getrandbits(32), safe_first_click=True)
+            for _ in range(rng.randint(1, 4)):
+                if not board.exploded:
+                    board.reveal_tile(rng.randrange(4), rng.randrange(5))
+            if board.exploded or board.solved:
+                continue
+            mines = [(i, j) for i in range(4) for j in range(5) if board.bottom[i][j] == -1 and not board.top[i][j]]
+            if mines and rng.random() < 0.3:
+                board.place_flag(*rng.choice(mines))
+            probabilities = engine.update(board)
+            expected = brute_force(board)
+            self.assertEqual(probabilities.keys(), expected.keys())
+            for tile, chance in expected.items():
+                self.assertAlmostEqual(probabilities[tile], chance)
+            checked += 1
+
+    def test_wrong_flags_give_no_probabilities(self):
+        board = Board()
+        board.create_new(5, 5, 1, seed=1, safe_first_click=True)
+        board.reveal_tile(0, 0)
+        covered = [(i, j) for i in range(5) for j in range(5) if not board.top[i][j]]
+        for tile in covered[:2]:  # two flags on a board with one mine
+            board.place_flag(*tile)
+        self.assertEqual(ProbabilityEngine().update(board), {})
+
+    def test_certain_tiles_agree_with_solver(self):
+        """Tiles the solver is sure of are certain for the engine too"""
+        rng = Random(7)
+        engine = ProbabilityEngine()
+        for _ in range(10):
+            board = Board()
+            board.create_new(30, 16, 99, rng.getrandbits(32), safe_first_click=True)
+            board.reveal_tile(8, 15)
+            solver = Solver(board, rng.getrandbits(32))
+            while not board.exploded and not board.solved:
+                probabilities = engine.update(board)
+                guesses = solver.guesses
+                safe, mines = solver.next_moves()
+                if solver.guesses == guesses:
+                    for tile in safe:
+                        self.assertAlmostEqual(probabilities[tile], 0)
+                    for tile in mines:
+                        self.assertAlmostEqual(probabilities[tile], 1)
+                solver.update(board.flag_many(mines) + board.reveal_many(safe))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import json
+import unittest
+
+from server import COVERED_VALUE, GameServer
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = GameServer()
+        self.connection = object()  # requests only use the writer to know which connection owns a session
+        self.server.connections[self.connection] = set()
+
+    def request(self, message):
+        line = message if isinstance(message, bytes) else json.dumps(message).encode()
+        return json.loads(self.server.request(line, self.connection))
+
+    def test_game(self):
+        reply = self.request({'op': 'new', 'width': 9, 'height': 9, 'mines': 10, 'seed': 1})
+        session = reply['session']
+        reply = self.request({'op': 'reveal', 'session': session, 'i': 4, 'j': 4})
+        self.assertEqual(reply['state'], 'playing')  # the first reveal is safe
+        self.assertTrue(reply['changed'])
+        self.assertNotIn(COVERED_VALUE, reply['changed'][2::3])
+        self.assertEqual(self.request({'op': 'close', 'session': session}), {'session': session, 'closed': True})
+        self.assertIn('error', self.request({'op': 'reveal', 'session': session, 'i': 0, 'j': 0}))
+
+    def test_bad_requests(self):
+        for message in [b'not json', b'[' * 100000 + b']' * 100000, {'op': 'new'}, {'op': 'dance'},
+                        {'op': 'new', 'width': 1e400, 'height': 5, 'mines': 3},
+                        {'op': 'new', 'width': 5, 'height': 5, 'mines': 30},
+                        {'op': 'new', 'width': 5, 'height': 5, 'mines': 3, 'seed': [1]},
+                        {'op': 'new', 'width': 5000, 'height': 5, 'mines': 3}]:
+            self.assertIn('error', self.request(message))
+        self.assertFalse(self.server.sessions)
+
+    def test_cell_limit(self):
+        self.server.max_cells = 100
+        for width, height in [(101, 1), (1, 101), (11, 10), (0, 5)]:
+            self.assertIn('error', self.request({'op': 'new', 'width': width, 'height': height, 'mines': 1}))
+        self.assertFalse(self.server.sessions)
+        for width, height in [(100, 1), (1, 100), (10, 10)]:
+            self.assertIn('session', self.request({'op': 'new', 'width': width, 'height': height, 'mines': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
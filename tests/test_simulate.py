@@ -0,0 +1,23 @@
+import unittest
+
+from simulate import game_seeds, play_chunk
+
+
+class SimulateTest(unittest.TestCase):
+    def test_seeds_are_independent(self):
+        board_seed, solver_seed = game_seeds(3, 0)
+        self.assertNotEqual(board_seed, solver_seed)
+        self.assertEqual(game_seeds(3, 0), (board_seed, solver_seed))
+        self.assertNotEqual(game_seeds(3, 1), (board_seed, solver_seed))
+
+    def test_expert_games_are_won(self):
+        # about one expert game in eight is won without a safe first click, none at all means the solver's guesses
+        # are tied to the mines
+        wins, guesses, times = play_chunk((30, 16, 99, 3, False, 0, 200))
+        self.assertGreater(wins, 0)
+        self.assertLess(guesses, 200 * 10)
+        self.assertEqual(len(times), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
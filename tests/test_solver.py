@@ -0,0 +1,33 @@
+import unittest
+from random import Random
+
+from data.core import Board
+from data.solver import Solver
+
+
+class SolverTest(unittest.TestCase):
+    def test_only_guesses_hit_mines(self):
+        """Moves the solver is sure of are never mines, so a lost game always ends on a guess"""
+        rng = Random(5)
+        for _ in range(40):
+            board = Board(debug=True)
+            board.create_new(30, 16, 99, rng.getrandbits(32), safe_first_click=True)
+            solver = Solver(board, rng.getrandbits(32))
+            while not board.exploded and not board.solved:
+                guesses = solver.guesses
+                solver.step()
+                if board.exploded:
+                    self.assertEqual(solver.guesses, guesses + 1)
+
+    def test_same_seed_same_game(self):
+        results = []
+        for _ in range(2):
+            board = Board()
+            board.create_new(30, 16, 99, seed=11)
+            solver = Solver(board, seed=11)
+            results.append((solver.play(), solver.guesses, board.top))
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()